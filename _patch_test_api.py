@@ -1,6 +1,4 @@
-from rich.console import Console
-console = Console()
-from bitunix_grid_bot import BitunixClient, load_secrets
+from bitunix_core import BitunixClient, load_secrets
 def test_api():
     sec = load_secrets()
     c = BitunixClient(sec["api_key"], sec["api_secret"])
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+# Tick benchmark against the in-process fake exchange: wall time, requests and bytes per tick by plan size.
+import time, json, argparse, tempfile, statistics
+import bitunix_core as bot
+from bitunix_core import config
+from bitunix_sim import FakeExchange
+
+def bench(levels,ticks=5,latency=0.0,concurrency=1,batch=False,band_pct=3.0,max_place=12):
+    ex=FakeExchange(mark=100000.0,available=5000.0,latency=latency)
+    c=bot.BitunixClient("bench","bench",ex)
+    cfg={"symbol":"BTCUSDT","leverage":3,"tif":"GTC","bandPct":band_pct,"maxPlacePerTick":max_place,"placeConcurrency":concurrency,"batchOrders":batch,"batchSize":20}
+    plan=bot.make_plan("BTCUSDT",80000,104000,130000,levels)
+    walls=[]; reqs=[]; sent=[]; recv=[]
+    for t in range(ticks):
+        ex.reset_counters(); t0=time.perf_counter()
+        plan,meta=bot.tick_execute(c,cfg,plan,band_pct=band_pct,max_place=max_place)
+        walls.append(time.perf_counter()-t0); st=ex.stats(); reqs.append(st["requests"]); sent.append(st["bytes_out"]); recv.append(st["bytes_in"])
+        bot.journal(cfg["symbol"]).clear()   # what save_plan does once the tick's outcome is on disk
+        ex.set_mark(ex.mark*(0.995 if t%2==0 else 1.004))   # walk the price so some BUYs and SELLs fill between ticks
+    return {"levels":levels,"ticks":ticks,"wall_ms_median":round(statistics.median(walls)*1000,2),"wall_ms_max":round(max(walls)*1000,2),
+            "requests_per_tick":round(statistics.mean(reqs),1),"bytes_out_per_tick":int(statistics.mean(sent)),"bytes_in_per_tick":int(statistics.mean(recv)),"stats":bot.plan_stats(plan)}
+
+def main():
+    ap=argparse.ArgumentParser()
+    ap.add_argument("--sizes",default="50,1000,100000")
+    ap.add_argument("--ticks",type=int,default=5)
+    ap.add_argument("--latency",type=float,default=0.0,help="simulated seconds per request")
+    ap.add_argument("--concurrency",type=int,default=1)
+    ap.add_argument("--batch",action="store_true")
+    ap.add_argument("--json",action="store_true")
+    a=ap.parse_args()
+    config.set_appdir(tempfile.mkdtemp())   # never touch the real ~/.bitunix_grid_bot cache or intent journal
+    rows=[bench(int(n),a.ticks,a.latency,a.concurrency,a.batch) for n in a.sizes.split(",")]
+    if a.json: print(json.dumps(rows,indent=2)); return
+    from rich.console import Console
+    from rich.table import Table
+    tbl=Table(title=f"tick benchmark | latency {a.latency*1000:.0f}ms concurrency {a.concurrency} batch {a.batch}")
+    for h in ("levels","wall ms (median)","wall ms (max)","requests/tick","bytes out/tick","bytes in/tick"): tbl.add_column(h)
+    for r in rows: tbl.add_row(str(r["levels"]),str(r["wall_ms_median"]),str(r["wall_ms_max"]),str(r["requests_per_tick"]),str(r["bytes_out_per_tick"]),str(r["bytes_in_per_tick"]))
+    Console().print(tbl)
+
+if __name__=="__main__": main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# Grid backtester: replays a plan over OHLCV candles with the same band / maxPlacePerTick rules as tick_execute, and
+# sizes orders with the engine's own window_qtys/sell_qtys. Fill detection is vectorised across all levels per tick
+# segment (one NumPy pass per segment, not per candle).
+import os, numpy as np
+from bitunix_core.engine import UTILIZATION, window_qtys, sell_qtys
+PENDING,PLACED,FILLED=0,1,2
+
+def load_candles(path):
+    # CSV or Parquet with open/high/low/close columns (any case); returns dict of float64 arrays
+    ext=os.path.splitext(path)[1].lower()
+    try:
+        import pandas as pd
+        df=pd.read_parquet(path) if ext in (".parquet",".pq") else pd.read_csv(path)
+        cols={c.lower():c for c in df.columns}
+        out={k:df[cols[k]].to_numpy(dtype=np.float64) for k in ("open","high","low","close")}
+        for k in ("ts","timestamp","time","open_time","date"):
+            if k in cols: out["ts"]=df[cols[k]].to_numpy(); break
+        return out
+    except ImportError:
+        if ext in (".parquet",".pq"): raise
+        with open(path) as f: hdr=[h.strip().lower() for h in f.readline().split(",")]
+        idx=[hdr.index(k) for k in ("open","high","low","close")]
+        a=np.loadtxt(path,delimiter=",",skiprows=1,usecols=idx,dtype=np.float64,ndmin=2)
+        return {"open":a[:,0],"high":a[:,1],"low":a[:,2],"close":a[:,3]}
+
+def backtest(plan,candles,capital=1000.0,leverage=3,band_pct=3.0,max_place=12,tick_every=60,cap_ratio=1.0,base_prec=4,min_vol=0.0001,fee_rate=0.0006,margin_buffer=0.02):
+    # cap ratio: modelled max buy price / mark, as learned by get_buy_cap (1.0 keeps the band just under the mark);
+    # fee_rate/margin_buffer as engine.margin_rates reads them from the config
+    price=np.array([L["price"] for L in plan["levels"]],dtype=np.float64)
+    is_buy=np.array([L["side"]=="BUY" for L in plan["levels"]])
+    order=np.argsort(price,kind="stable"); price=price[order]; is_buy=is_buy[order]
+    status=np.zeros(len(price),dtype=np.int8); qty=np.zeros(len(price))
+    hi,lo,cl=candles["high"],candles["low"],candles["close"]
+    n=len(cl); starts=np.arange(0,n,tick_every)
+    seg_low=np.minimum.reduceat(lo,starts); seg_high=np.maximum.reduceat(hi,starts)
+    seg_close=cl[np.minimum(starts+tick_every,n)-1]; open_mark=np.concatenate(([candles["open"][0]],seg_close[:-1]))
+    pos=0.0; entry=0.0; realized=0.0; last_q=0.0
+    buys_filled=0; sells_filled=0; peak=capital; max_dd=0.0; util_sum=0.0
+    equity_curve=np.empty(len(starts))
+    for k in range(len(starts)):
+        mark=open_mark[k]
+        hb=round(mark*cap_ratio*0.999,2); lb=round(hb*(1-band_pct/100.0),2)
+        locked=float((price*qty)[is_buy&(status==PLACED)].sum())/leverage+pos*entry/leverage
+        avail=max(0.0,capital+realized-locked)
+        win=np.flatnonzero(is_buy&(status==PENDING)&(price>=lb)&(price<=hb))[:max_place]
+        if len(win):
+            # avail already excludes the margin placed BUYs hold, so the budget needs no unfrozen-margin correction
+            qs=np.array(window_qtys(avail*UTILIZATION*(1-margin_buffer),price[win].tolist(),leverage,fee_rate,base_prec,min_vol))
+            win=win[qs>0]; qs=qs[qs>0]
+            if len(win): status[win]=PLACED; qty[win]=qs; last_q=float(qs[-1])
+        if pos>0:
+            # like tick_execute, queued SELLs reuse the last BUY qty, capped by the long not yet covered by resting SELLs
+            take=np.flatnonzero(~is_buy&(status==PENDING))[:max_place]
+            room=max(0.0,pos-float(qty[~is_buy&(status==PLACED)].sum()))
+            sq=sell_qtys(last_q or min_vol,room,len(take),base_prec,min_vol); take=take[:len(sq)]
+            if len(take): status[take]=PLACED; qty[take]=sq
+        locked=float((price*qty)[is_buy&(status==PLACED)].sum())/leverage+pos*entry/leverage
+        util_sum+=min(1.0,locked/max(1e-9,capital+realized))
+        # fills inside the segment, across every placed level at once
+        bf=np.flatnonzero(is_buy&(status==PLACED)&(price>=seg_low[k]))
+        if len(bf):
+            bq=qty[bf]; cost=float((price[bf]*bq).sum())
+            entry=(entry*pos+cost)/(pos+bq.sum()); pos+=float(bq.sum()); status[bf]=FILLED; buys_filled+=len(bf)
+        sf=np.flatnonzero(~is_buy&(status==PLACED)&(price<=seg_high[k]))
+        if len(sf) and pos>0:
+            sq=qty[sf]; cum=np.cumsum(sq); room=np.clip(pos-(cum-sq),0,None); done=np.minimum(sq,room)
+            hit=done>0; sf=sf[hit]; done=done[hit]
+            realized+=float(((price[sf]-entry)*done).sum()); pos-=float(done.sum()); status[sf]=FILLED; sells_filled+=len(sf)
+            if pos<=1e-12: pos=0.0; entry=0.0
+        eq=capital+realized+pos*(seg_close[k]-entry); equity_curve[k]=eq
+        peak=max(peak,eq); max_dd=max(max_dd,(peak-eq)/peak if peak>0 else 0.0)
+    return {"ticks":len(starts),"candles":n,"buys_filled":buys_filled,"sells_filled":sells_filled,"realized_pnl":round(realized,4),
+            "open_qty":round(pos,8),"avg_entry":round(float(entry),2),"unrealized_pnl":round(float(pos*(cl[-1]-entry)),4) if n else 0.0,
+            "final_equity":round(float(equity_curve[-1]),4) if n else capital,"avg_utilization":round(float(util_sum)/max(1,len(starts)),4),
+            "max_drawdown_pct":round(float(max_dd)*100,3)}
+
+# --- parameter sweep -------------------------------------------------------
+
+SWEEP_KEYS=("lowest_buy","highest_buy","highest_sell","total_levels","buy_fraction","band_pct")
+_W={}
+
+def parse_range(spec,cast=float):
+    # "a:b:step" (inclusive) or "a,b,c" or a single value
+    spec=str(spec)
+    if ":" in spec:
+        a,b,st=(float(x) for x in spec.split(":"))
+        return [cast(x) for x in np.arange(a,b+st/2,st)]
+    return [cast(x) for x in spec.split(",")]
+
+def _init_worker(npy_path,fixed):
+    # each worker maps the shared candle file once; the OS page cache backs every process with the same pages
+    from bitunix_core.plan import make_plan
+    a=np.load(npy_path,mmap_mode="r")
+    _W.update(candles={"open":a[0],"high":a[1],"low":a[2],"close":a[3]},fixed=fixed,make_plan=make_plan)
+
+def _score(params):
+    p=_W["make_plan"]("SWEEP",params["lowest_buy"],params["highest_buy"],params["highest_sell"],int(params["total_levels"]),params["buy_fraction"])
+    return {**params,**backtest(p,_W["candles"],band_pct=params["band_pct"],**_W["fixed"])}
+
+def sweep(path,grid,workers=None,rank_by="final_equity",descending=True,**fixed):
+    import itertools, tempfile
+    from concurrent.futures import ProcessPoolExecutor
+    combos=[dict(zip(SWEEP_KEYS,v)) for v in itertools.product(*(grid[k] for k in SWEEP_KEYS))]
+    combos=[c for c in combos if c["lowest_buy"]<c["highest_buy"]<c["highest_sell"] and 0<c["buy_fraction"]<1]
+    c=load_candles(path)
+    fd,npy=tempfile.mkstemp(suffix=".npy"); os.close(fd)
+    try:
+        np.save(npy,np.stack([c["open"],c["high"],c["low"],c["close"]]))
+        with ProcessPoolExecutor(max_workers=workers,initializer=_init_worker,initargs=(npy,fixed)) as ex:
+            chunk=max(1,len(combos)//((workers or os.cpu_count() or 1)*8))
+            rows=list(ex.map(_score,combos,chunksize=chunk))
+    finally: os.remove(npy)
+    rows.sort(key=lambda r: r[rank_by],reverse=descending)
+    return rows
@@ -0,0 +1,31 @@
+# Console rendering shared by both front ends: the rich console, the paged plan table and the tick meta printout.
+# bitunix_core never prints; everything it reports comes back in dicts that end up here.
+import json
+from rich.console import Console
+from bitunix_core.plan import status_view, parse_cursor
+
+console=Console()
+
+def print_meta(out, metas):
+    # the engine reports a crash recovery or a missing cap in each symbol's meta instead of printing; surface them
+    for sym,m in metas.items():
+        rec=m.get("recovered")
+        if rec and rec["placed"]+rec["filled"]+rec["lost"]: console.print({"recovered":rec,"symbol":sym})
+        if m.get("error"): console.print(f"[red]{sym}: {m['error']}[/]")
+    console.print(out)
+
+def status_table(plan, as_json=False, **filters):
+    # after= takes the (price, idx) cursor or the "price:idx" string printed under the previous page
+    if isinstance(filters.get("after"),str): filters["after"]=parse_cursor(filters["after"])
+    v=status_view(plan,**filters)
+    if as_json: print(json.dumps(v,default=str)); return v
+    from rich.table import Table
+    st=v["stats"]; cap=v["cap"] or {}
+    title=f"Plan {v['symbol']} | total {st['total']} placed {st['placed']} filled {st['filled']} pending {st['pending']}"
+    if cap: title+=f" | cap {cap.get('cap')} band {cap.get('lb')}-{cap.get('hb')}"
+    tbl=Table(title=title,caption=f"{len(v['levels'])} of {v['matching']} matching"+(f" around {v['around']}" if v["around"] else "")+(f" | next page: --after {v['next']}" if v["next"] else ""))
+    tbl.add_column("Idx"); tbl.add_column("Side"); tbl.add_column("Price"); tbl.add_column("Status"); tbl.add_column("Qty"); tbl.add_column("OrderId")
+    for L in v["levels"]:
+        tbl.add_row(str(L["idx"]),L["side"],str(L["price"]),L["status"],str(L.get("fill_qty") or L.get("qty") or ""),str(L.get("orderId") or ""))
+    console.print(tbl)
+    return v
@@ -0,0 +1,34 @@
+# Headless core of the grid bot: the signed client, the plan model and the tick engine, with no console or menu.
+# Importing the package is cheap: the submodules load on first attribute access, requests only when an
+# HttpTransport is built, yaml only when config or a yaml plan is read. Settings that callers may rebind (APPDIR
+# and the paths under it, client.BASE, engine.HISTORY_LIMIT) live on their submodule; use config.set_appdir().
+#
+#   from bitunix_core import BitunixClient, make_plan, tick_execute
+#   plan,meta=tick_execute(BitunixClient(key,secret),cfg,make_plan("BTCUSDT",80000,104000,130000,50))
+
+_EXPORTS={
+    "config":("set_appdir","ensure_dirs","save_secrets","load_secrets","load_cfg","save_cfg"),
+    "metrics":("TickMetrics","METRICS"),
+    "cache":("DiskCache","CACHE","CACHE_TTL","cache_ttl"),
+    "client":("HttpTransport","TokenBucket","BitunixClient","transport_from_cfg","limiter_from_cfg","get_client"),
+    "plan":("make_plan","LevelIndex","plan_index","plan_stats","status_view","parse_cursor","regrid_diff","load_plan_yaml","save_plan_yaml",
+            "load_plan_db","save_plan_db","plan_store","plan_paths","load_plan","save_plan","IntentJournal","journal","plan_id","client_id",
+            "cid_parts","next_client_id","note_attempts","export_snapshot","plan_mtime"),
+    "engine":("get_account","get_rules","prefetch_rules","get_mark_price","get_marks","get_buy_cap","detect_buy_cap","account_margin",
+              "cancel_all_symbol","long_position","TickSnapshot","margin_rates","window_qtys","size_window","sell_room","sell_qtys","fetch_fills","reconcile_fills","place_all",
+              "place_buys","batch_size","recover_intents","tick_execute","symbol_cfgs","allocate_margin","tick_cycle","run_cycle","apply_regrid"),
+    "ticklog":("TICK_HEADER","archive_key","rotate_ticklog","log_tick","write_prom"),
+    "history":("PlanHistory","plan_history"),
+}
+_WHERE={n:m for m,names in _EXPORTS.items() for n in names}
+__all__=sorted(_WHERE)
+
+def __getattr__(name):
+    m=_WHERE.get(name)
+    if m is None: raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+    v=getattr(importlib.import_module(f"{__name__}.{m}"),name)
+    globals()[name]=v
+    return v
+
+def __dir__(): return sorted(set(globals())|set(__all__))
@@ -0,0 +1,37 @@
+# Disk-backed TTL cache for exchange rules, the learned band ratio and the API check.
+import os, json, time, threading
+from . import config
+
+class DiskCache:
+    # Small JSON key/value cache with a TTL per key; entries are {"v":value,"exp":epoch}.
+    def __init__(self,path,enabled=True):
+        self.path=path; self.enabled=enabled; self.lock=threading.Lock(); self._d=None
+    def _load(self):
+        if self._d is None:
+            try: self._d=json.load(open(self.path))
+            except: self._d={}
+        return self._d
+    def _flush(self):
+        tmp=self.path+".tmp"
+        with open(tmp,"w") as f: json.dump(self._d,f)
+        os.replace(tmp,self.path)
+    def get(self,key):
+        if not self.enabled: return None
+        with self.lock:
+            e=self._load().get(key)
+            return e["v"] if e and e["exp"]>time.time() else None
+    def put(self,key,value,ttl):
+        with self.lock:
+            self._load()[key]={"v":value,"exp":time.time()+float(ttl)}; self._flush()
+    def drop(self,*prefixes):
+        with self.lock:
+            d=self._load(); gone=[k for k in d if k.startswith(prefixes)]
+            for k in gone: del d[k]
+            if gone: self._flush()
+
+CACHE=DiskCache(config.CACHEFILE)
+CACHE_TTL={"rules":86400,"levmargin":3600,"band":21600}
+# exchange error codes that mean a cached entry no longer matches the exchange
+STALE_CODES={10008:("rules:",),20001:("rules:",),30001:("rules:",),20005:("levmargin:",),20006:("levmargin:",),20009:("levmargin:",)}
+
+def cache_ttl(cfg,kind): return float(((cfg or {}).get("cacheTtl") or {}).get(kind,CACHE_TTL[kind]))
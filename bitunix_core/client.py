@@ -0,0 +1,151 @@
+# Signed REST client for the BitUnix futures API. requests is only imported when the default HttpTransport is
+# built, so a client over another transport (the fake exchange, an embedding service's own) never loads it.
+import json, time, uuid, threading
+from . import config
+from .metrics import METRICS
+from .cache import CACHE, STALE_CODES
+
+BASE="https://fapi.bitunix.com"
+
+def now_ms(): return str(int(time.time()*1000))
+def sha256_hex(s):
+    import hashlib
+    return hashlib.sha256(s.encode()).hexdigest()
+
+class HttpTransport:
+    # Pooled keep-alive transport; any object with request(method,url,headers,data) returning JSON can stand in for it.
+    def __init__(self,pool_size=10,connect_timeout=5.0,read_timeout=30.0,retries=3,backoff=0.3):
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        self.timeout=(connect_timeout,read_timeout)
+        # connect errors are retried for every method; read/status retries only for GET so an order POST is never sent twice
+        retry=Retry(total=retries,connect=retries,read=retries,status=retries,backoff_factor=backoff,status_forcelist=(429,500,502,503,504),allowed_methods=frozenset({"GET"}),raise_on_status=False)
+        self.session=requests.Session()
+        adapter=HTTPAdapter(pool_connections=pool_size,pool_maxsize=pool_size,max_retries=retry)
+        self.session.mount("https://",adapter); self.session.mount("http://",adapter)
+    def request(self,method,url,headers=None,data=None):
+        r=self.session.request(method,url,headers=headers,data=data,timeout=self.timeout)
+        retries=getattr(r.raw,"retries",None)
+        if retries is not None and retries.history: METRICS.retry(len(retries.history))
+        return r.json()
+    def close(self): self.session.close()
+
+def transport_from_cfg(cfg):
+    h=(cfg or {}).get("http",{}) or {}
+    return HttpTransport(pool_size=int(h.get("poolSize",10)),connect_timeout=float(h.get("connectTimeout",5.0)),read_timeout=float(h.get("readTimeout",30.0)),retries=int(h.get("retries",3)),backoff=float(h.get("backoff",0.3)))
+
+class TokenBucket:
+    # Thread-safe requests-per-second budget shared by every call made through one client.
+    def __init__(self,rate,burst=None):
+        self.rate=float(rate); self.cap=float(burst or max(1.0,rate))
+        self.tokens=self.cap; self.t=time.monotonic(); self.lock=threading.Lock()
+    def acquire(self):
+        while True:
+            with self.lock:
+                now=time.monotonic()
+                self.tokens=min(self.cap,self.tokens+(now-self.t)*self.rate); self.t=now
+                if self.tokens>=1:
+                    self.tokens-=1; return
+                wait=(1-self.tokens)/self.rate
+            time.sleep(wait)
+
+def limiter_from_cfg(cfg):
+    rps=(cfg or {}).get("rateLimitPerSec")
+    return TokenBucket(rps,(cfg or {}).get("rateLimitBurst")) if rps else None
+
+class BitunixClient:
+    def __init__(self,k,s,transport=None,limiter=None,cache=None):
+        self.k=k; self.s=s
+        self.h={"language":"en-US","Content-Type":"application/json"}
+        self.transport=transport or HttpTransport()
+        self.limiter=limiter; self.cache=cache
+    def _seen(self,r):
+        if self.cache is not None and isinstance(r,dict) and r.get("code") in STALE_CODES: self.cache.drop(*STALE_CODES[r["code"]])
+        return r
+    def _sign(self,method,path,q=None,b=None):
+        nonce=uuid.uuid4().hex; ts=now_ms(); qp=""
+        if q: qp="".join([f"{k}{v}" for k,v in sorted(q.items())])
+        body=json.dumps(b,separators=(',',':')) if b else ""
+        digest=sha256_hex(nonce+ts+self.k+qp+body)
+        sign=sha256_hex(digest+self.s)
+        h={**self.h,"api-key":self.k,"nonce":nonce,"timestamp":ts,"sign":sign}
+        url=BASE+path
+        if q: url+="?"+ "&".join([f"{k}={v}" for k,v in sorted(q.items())])
+        return url,h,body
+    def _call(self,method,p,q,b):
+        if self.limiter: self.limiter.acquire()
+        t=time.perf_counter(); u,h,d=self._sign(method,p,q,b); t1=time.perf_counter()
+        code=None
+        try:
+            r=self.transport.request(method,u,headers=h,data=d if method=="POST" else None)
+            code=r.get("code") if isinstance(r,dict) else None
+            return self._seen(r)
+        finally:
+            METRICS.add("sign",(t1-t)*1000); METRICS.call(p,(time.perf_counter()-t1)*1000,code if code is not None else "transport")
+    def get(self,p,q=None): return self._call("GET",p,q,None)
+    def post(self,p,b=None): return self._call("POST",p,None,b)
+    def change_leverage(self,symbol,lev,coin="USDT"):
+        return self.post("/api/v1/futures/account/change_leverage",{"symbol":symbol,"leverage":int(lev),"marginCoin":coin})
+    def change_margin_mode(self,symbol,mode="ISOLATION",coin="USDT"):
+        return self.post("/api/v1/futures/account/change_margin_mode",{"symbol":symbol,"marginMode":mode,"marginCoin":coin})
+    def change_position_mode(self,mode="ONE_WAY"):
+        return self.post("/api/v1/futures/account/change_position_mode",{"positionMode":mode})
+    def place(self,b): return self.post("/api/v1/futures/trade/place_order",b)
+    def pending_orders(self,symbol): return self.post("/api/v1/futures/trade/get_pending_orders",{"symbol":symbol})
+    def cancel_orders(self,orderIdList): return self.post("/api/v1/futures/trade/cancel_orders",{"orderIdList":orderIdList})
+    def place_batch(self,bodies,size=20):
+        # one result per body, shaped like a place() reply so callers can treat both paths alike
+        out=[]
+        for i in range(0,len(bodies),size):
+            chunk=bodies[i:i+size]
+            r=self.post("/api/v1/futures/trade/batch_order",{"symbol":chunk[0]["symbol"],"orderList":[{k:v for k,v in b.items() if k!="symbol"} for b in chunk]})
+            out+=_batch_results(r,[b.get("clientId") for b in chunk],"clientId")
+        return out
+    def cancel_batch(self,orderIdList,size=20):
+        ok=[]; bad=[]
+        for i in range(0,len(orderIdList),size):
+            r=self.cancel_orders(orderIdList[i:i+size])
+            d=r.get("data") if isinstance(r.get("data"),dict) else {}
+            if r.get("code")!=0: bad+=[{**o,"errorCode":r.get("code"),"errorMsg":r.get("msg")} for o in orderIdList[i:i+size]]
+            else: ok+=d.get("successList") or []; bad+=d.get("failureList") or []
+        return {"code":0 if not bad else -1,"msg":"Success" if not bad else f"{len(bad)} cancels failed","data":{"successList":ok,"failureList":bad}}
+    def order_detail(self,order_id=None,client_id=None):
+        q={}
+        if order_id: q["orderId"]=order_id
+        if client_id: q["clientId"]=client_id
+        return self.get("/api/v1/futures/trade/get_order_detail",q)
+    def history_orders(self,symbol,start=None,skip=0,limit=100):
+        q={"symbol":symbol,"skip":skip,"limit":limit}
+        if start: q["startTime"]=start
+        return self.get("/api/v1/futures/trade/get_history_orders",q)
+    def history_trades(self,symbol,start=None,skip=0,limit=100):
+        q={"symbol":symbol,"skip":skip,"limit":limit}
+        if start: q["startTime"]=start
+        return self.get("/api/v1/futures/trade/get_history_trades",q)
+    def positions(self,symbol=None):
+        q={}
+        if symbol: q["symbol"]=symbol
+        return self.get("/api/v1/futures/position/get_pending_positions",q)
+
+def _batch_results(r,keys,field):
+    if r.get("code")!=0: return [{"code":r.get("code"),"msg":r.get("msg")} for _ in keys]
+    d=r.get("data") or {}
+    by={}
+    for o in d.get("successList") or []: by[o.get(field)]={"code":0,"data":{"orderId":o.get("orderId"),"clientId":o.get("clientId")}}
+    for o in d.get("failureList") or []:
+        try: code=int(o.get("errorCode"))
+        except: code=o.get("errorCode")
+        by[o.get(field)]={"code":code,"msg":o.get("errorMsg")}
+    return [by.get(k,{"code":-1,"msg":"missing from batch reply"}) for k in keys]
+
+_client=None
+def get_client(cfg=None):
+    # one client (and one connection pool) per process; rebuilt only when the keys change
+    global _client
+    sec=config.load_secrets()
+    if cfg is None: cfg=config.load_cfg()
+    if _client is None or (_client.k,_client.s)!=(sec["api_key"],sec["api_secret"]):
+        if _client is not None: _client.transport.close()
+        _client=BitunixClient(sec["api_key"],sec["api_secret"],transport_from_cfg(cfg),limiter_from_cfg(cfg),CACHE)
+    return _client
@@ -0,0 +1,58 @@
+# Where the bot keeps its state, and the secrets/config files. Other modules read these as config.NAME at call time,
+# so set_appdir() relocates everything (an embedding service, a benchmark's temp dir) without touching ~.
+import os, sys, json, time, uuid, pathlib, stat
+
+HOME=os.path.expanduser("~")
+APPDIR=os.path.join(HOME,".bitunix_grid_bot")
+
+def set_appdir(path):
+    global APPDIR, SECRETS, CONFIG, PLAN, PLANDB, LOGDIR, TICKCSV, SNAPCSV, CACHEFILE, PROMFILE, SOCK
+    APPDIR=path
+    SECRETS=os.path.join(APPDIR,"secrets.json")
+    CONFIG=os.path.join(APPDIR,"config.yaml")
+    PLAN=os.path.join(APPDIR,"plan.yaml")
+    PLANDB=os.path.join(APPDIR,"plan.db")
+    LOGDIR=os.path.join(APPDIR,"logs")
+    TICKCSV=os.path.join(LOGDIR,"ticks.csv")
+    SNAPCSV=os.path.join(LOGDIR,"plan_snapshot.csv")
+    CACHEFILE=os.path.join(APPDIR,"cache.json")
+    PROMFILE=os.path.join(LOGDIR,"bitunix_grid_bot.prom")
+    SOCK=os.path.join(APPDIR,"daemon.sock")
+    cache=getattr(sys.modules.get(__package__+".cache"),"CACHE",None)   # the shared DiskCache follows, once it exists
+    if cache is not None:
+        with cache.lock: cache.path=CACHEFILE; cache._d=None
+
+set_appdir(APPDIR)
+
+DEFAULT_CFG={"symbol":"BTCUSDT","leverage":3,"marginMode":"ISOLATION","positionMode":"ONE_WAY","tif":"GTC","levels":16,"bandPct":3.0,"highestSell":200000,"maxPlacePerTick":12,"placeConcurrency":1,"rateLimitPerSec":10,"batchOrders":False,"batchSize":20,"http":{"poolSize":10,"connectTimeout":5.0,"readTimeout":30.0,"retries":3}}
+
+def ensure_dirs():
+    import yaml, csv
+    from .ticklog import TICK_HEADER
+    pathlib.Path(APPDIR).mkdir(parents=True,exist_ok=True)
+    pathlib.Path(LOGDIR).mkdir(parents=True,exist_ok=True)
+    if not os.path.exists(SECRETS):
+        with open(SECRETS,"w") as f: json.dump({"api_key":"","api_secret":""},f)
+        os.chmod(SECRETS,stat.S_IRUSR|stat.S_IWUSR)
+    if not os.path.exists(CONFIG):
+        with open(CONFIG,"w") as f: yaml.safe_dump(DEFAULT_CFG,f)
+    if not os.path.exists(PLAN):
+        with open(PLAN,"w") as f: yaml.safe_dump({"symbol":"BTCUSDT","levels":[],"meta":{"id":uuid.uuid4().hex[:8],"created":int(time.time())}},f)
+    if not os.path.exists(TICKCSV):
+        with open(TICKCSV,"w",newline="") as f:
+            w=csv.writer(f)
+            w.writerow(TICK_HEADER)
+
+def save_secrets(k,s):
+    with open(SECRETS,"w") as f: json.dump({"api_key":k,"api_secret":s},f)
+    os.chmod(SECRETS,stat.S_IRUSR|stat.S_IWUSR)
+
+def load_secrets(): return json.load(open(SECRETS))
+
+def load_cfg():
+    import yaml
+    return yaml.safe_load(open(CONFIG))
+
+def save_cfg(cfg):
+    import yaml
+    yaml.safe_dump(cfg,open(CONFIG,"w"))
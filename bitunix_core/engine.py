@@ -0,0 +1,487 @@
+# Tick engine: exchange reads (rules, account, cap, positions, fills) gathered into a TickSnapshot, margin sizing,
+# placement with the 20003/30014 fallbacks, crash recovery, the multi-symbol cycle and re-gridding. Results come
+# back as (plan, meta); nothing here prints.
+import re, time, uuid
+from concurrent.futures import ThreadPoolExecutor
+from .metrics import METRICS
+from .cache import CACHE, CACHE_TTL, cache_ttl
+from .plan import plan_index, load_plan, save_plan, journal, plan_id, client_id, cid_parts, next_client_id, note_attempts, regrid_diff
+from .ticklog import log_tick, write_prom
+
+UTILIZATION=0.95
+
+def _first_row_like(d):
+    if isinstance(d,list) and d: return d[0]
+    if isinstance(d,dict): return d
+    return {}
+
+def get_account(c):
+    r=c.get("/api/v1/futures/account",{"marginCoin":"USDT"})
+    avail,_=account_margin(r)
+    return avail,r
+
+def prefetch_rules(c,symbols,ttl=CACHE_TTL["rules"]):
+    # one trading_pairs call for every symbol whose rules are not cached; get_rules then hits the cache
+    missing=[s for s in symbols if CACHE.get(f"rules:{s}") is None]
+    if not missing: return
+    r=c.get("/api/v1/futures/market/trading_pairs",{"symbols":",".join(missing)})
+    if r.get("code")==0 and isinstance(r.get("data"),list):
+        for row in r["data"]:
+            if row.get("symbol") in missing: CACHE.put(f"rules:{row['symbol']}",row,ttl)
+
+def get_rules(c,symbol,ttl=CACHE_TTL["rules"]):
+    row=CACHE.get(f"rules:{symbol}")
+    if row is not None: return int(row.get("basePrecision",4)),float(row.get("minTradeVolume","0.0001")),{"code":0,"data":[row],"cached":True}
+    r=c.get("/api/v1/futures/market/trading_pairs",{"symbols":symbol})
+    row=_first_row_like(r.get("data"))
+    if r.get("code")==0 and row: CACHE.put(f"rules:{symbol}",row,ttl)
+    basePrecision=int(row.get("basePrecision",4)) if row else 4
+    minTradeVolume=float(row.get("minTradeVolume","0.0001")) if row else 0.0001
+    return basePrecision,minTradeVolume,r
+
+def round_qty(qty, prec):
+    fmt="{:0."+str(prec)+"f}"
+    return float(fmt.format(qty))
+
+def detect_buy_cap(c,symbol,probe_price,min_vol):
+    r=c.place({"symbol":symbol,"side":"BUY","tradeSide":"OPEN","orderType":"LIMIT","qty":str(min_vol),"price":str(probe_price),"effect":"POST_ONLY","reduceOnly":False,"clientId":f"probe-{uuid.uuid4().hex[:6]}"})
+    if r.get("code")==0 and r.get("data") and r["data"].get("orderId"):
+        oid=r["data"]["orderId"]; c.cancel_orders([{"orderId":oid,"symbol":symbol}]); return None,r
+    m=re.search(r"Max Buy Order Price\s+([0-9]+(?:\.[0-9]+)?)", str(r.get("msg","")))
+    if r.get("code")==30014 and m: return float(m.group(1)),r
+    return None,r
+
+def get_mark_price(c,symbol):
+    r=c.get("/api/v1/futures/market/tickers",{"symbols":symbol})
+    row=_first_row_like(r.get("data"))
+    for k in ("markPrice","lastPrice"):
+        try: return float(row[k]),r
+        except: pass
+    return None,r
+
+def get_marks(c,symbols):
+    # mark prices for many symbols from a single tickers call
+    r=c.get("/api/v1/futures/market/tickers",{"symbols":",".join(symbols)}); out={}
+    for row in r.get("data") or [] if isinstance(r.get("data"),list) else []:
+        for k in ("markPrice","lastPrice"):
+            try: out[row["symbol"]]=float(row[k]); break
+            except: pass
+    return out
+
+def get_buy_cap(c,cfg,min_vol,force_probe=False,mark=None):
+    # cap = mark * learned band ratio; the probe order only runs when the ratio is missing, stale or was rejected
+    symbol=cfg["symbol"]; ratio=cfg.get("capRatio") or CACHE.get(f"band:{symbol}")
+    if not force_probe and ratio:
+        if mark is None: mark,_=get_mark_price(c,symbol)
+        if mark: return round(mark*float(ratio),2),"model"
+    cap,_=detect_buy_cap(c,symbol,10**9,min_vol)
+    if cap is not None:
+        mark,_=get_mark_price(c,symbol)
+        if mark: CACHE.put(f"band:{symbol}",cap/mark,cache_ttl(cfg,"band"))
+    return cap,"probe"
+
+def cancel_all_symbol(c,symbol,batch=0,pending=None):
+    pend=pending if pending is not None else TickSnapshot(c,{"symbol":symbol},want=("pending",)).fetch().pending; ids=[]
+    if pend.get("code")==0 and pend.get("data"):
+        for o in pend["data"]:
+            ids.append({"orderId":o["orderId"],"symbol":symbol})
+    if ids and batch: return c.cancel_batch(ids,batch)
+    if ids: return c.cancel_orders(ids)
+    return {"code":0,"msg":"No pending"}
+
+def long_position(pos):
+    # (positionId, openQty) of the open LONG in a positions reply, or (None, 0.0)
+    if pos.get("code")==0:
+        for p in pos.get("data") or []:
+            if p.get("side")=="LONG" and float(p.get("openQty","0"))>0: return p.get("positionId"),float(p.get("openQty","0"))
+    return None,0.0
+
+class TickSnapshot:
+    # Everything a tick reads from the exchange, fetched in one concurrent fan-out before anything is placed, so the
+    # read side costs about as much as its slowest call. Later phases read from here rather than fetching again.
+    KINDS=("rules","account","cap","positions","fills","pending")
+    def __init__(self,c,cfg,plan=None,want=("rules","account","cap","positions","fills"),account=None,marks=None,positions=None):
+        self.c=c; self.cfg=cfg; self.plan=plan; self.want=set(want); self.marks=marks or {}
+        self.base_prec=4; self.min_vol=0.0001; self.cap=None; self.cap_src=None
+        self.positions=positions; self.pending=self.fills=None; self.acct=None
+        self.avail,self.frozen=account if account is not None else (None,None)
+        if account is not None: self.want.discard("account")
+        if positions is not None: self.want.discard("positions")
+    def fetch(self):
+        c=self.c; sym=self.cfg["symbol"]; span=METRICS.span
+        if "rules" in self.want or "cap" in self.want:
+            # the cap probe sizes its order with min_vol, so uncached rules are read first (once a day at most)
+            with span("rules"): self.base_prec,self.min_vol,_=get_rules(c,sym,cache_ttl(self.cfg,"rules"))
+        jobs={}
+        if "account" in self.want: jobs["account"]=lambda: get_account(c)
+        if "cap" in self.want: jobs["cap"]=lambda: get_buy_cap(c,self.cfg,self.min_vol,mark=self.marks.get(sym))
+        if "positions" in self.want: jobs["positions"]=lambda: c.positions(sym)
+        if "pending" in self.want: jobs["pending"]=lambda: c.pending_orders(sym)
+        if "fills" in self.want: jobs["reconcile"]=lambda: fetch_fills(c,sym,self.plan,force="pending" in self.want)
+        def run(k):
+            with span(k): return jobs[k]()
+        with span("snapshot"):
+            if len(jobs)<=1: out={k:run(k) for k in jobs}
+            else:
+                with ThreadPoolExecutor(max_workers=len(jobs)) as ex: out=dict(zip(jobs,ex.map(run,jobs)))
+        if "account" in out: self.avail,self.acct=out["account"]; _,self.frozen=account_margin(self.acct)
+        if "cap" in out: self.cap,self.cap_src=out["cap"]
+        if "positions" in out: self.positions=out["positions"]
+        if "pending" in out: self.pending=out["pending"]
+        if "reconcile" in out: self.fills=out["reconcile"]
+        return self
+    def long(self): return long_position(self.positions or {})
+
+def floor_qty(qty, prec):
+    f=10**prec
+    return int(qty*f+1e-9)/f
+
+def account_margin(r):
+    # available/frozen from an account reply, tolerant of the field names the API has used
+    row=_first_row_like(r.get("data")); out={}
+    for name,keys in (("available",("available","availableBalance","availableMargin","cashBalance","availableCash")),("frozen",("frozen","frozenMargin","orderMargin"))):
+        for k in keys:
+            try: out[name]=float(row[k]); break
+            except: pass
+    return out.get("available",0.0),out.get("frozen",0.0)
+
+def plan_leverage(cfg):
+    return float((CACHE.get(f"levmargin:{cfg['symbol']}") or {}).get("leverage") or cfg["leverage"])
+
+def placed_margin(plan, lev):
+    # margin the plan's resting BUYs hold (or will hold once the exchange freezes it)
+    ix=plan_index(plan)
+    return sum(plan["levels"][i]["price"]*float(plan["levels"][i].get("qty") or 0) for i in ix.ids("BUY","PLACED"))/lev
+
+def margin_rates(cfg):
+    # (fee rate, margin buffer) a BUY reserves on top of price*qty/lev; cross margin keeps a wider buffer
+    return float(cfg.get("feeRate",0.0006)),float(cfg.get("marginBuffer",0.05 if str(cfg.get("marginMode","")).upper()=="CROSS" else 0.02))
+
+def window_qtys(budget, prices, lev, fee, base_prec, min_vol):
+    # One pass over the window: each BUY needs price*qty*(1/lev + fee) of margin. qty is floored to the step so the
+    # sum never exceeds the budget (round-to-nearest could push the last order over and earn a 20003).
+    unit=[p*(1.0/lev+fee) for p in prices]
+    q=floor_qty(budget/sum(unit), base_prec)
+    if q>=min_vol: return [q]*len(prices)
+    # not enough for min_vol everywhere: fund the lowest levels at min_vol and skip the rest
+    out=[]; spent=0.0
+    for u in unit:
+        if spent+u*min_vol<=budget: out.append(min_vol); spent+=u*min_vol
+        else: out.append(0.0)
+    return out
+
+def size_window(cfg, avail, frozen, lev, plan, prices, base_prec, min_vol):
+    # Margin the exchange has not yet frozen for plan BUYs we already placed is taken off the budget first.
+    if not prices: return []
+    fee,buffer=margin_rates(cfg)
+    budget=max(0.0,(avail-max(0.0,placed_margin(plan,lev)-frozen))*UTILIZATION*(1-buffer))
+    return window_qtys(budget,prices,lev,fee,base_prec,min_vol)
+
+def sell_room(plan, open_qty):
+    # reduce-only SELLs may not rest for more than the open long minus SELLs already resting
+    ix=plan_index(plan)
+    return max(0.0,open_qty-sum(float(plan["levels"][i].get("qty") or 0) for i in ix.ids("SELL","PLACED")))
+
+def sell_qtys(qty, room, n, base_prec, min_vol):
+    # up to n SELL qtys of qty each, the last one cut to what is left of room; stops once below min_vol
+    out=[]
+    for _ in range(n):
+        q=floor_qty(min(qty,room),base_prec)
+        if q<min_vol: break
+        out.append(q); room-=q
+    return out
+
+HISTORY_LIMIT=100
+
+def history_pages(fetch,key,symbol,start):
+    # every row of a skip/limit paginated history endpoint from start on; None if any page fails
+    out=[]; skip=0
+    while True:
+        r=fetch(symbol,start,skip,HISTORY_LIMIT)
+        if r.get("code")!=0: return None
+        d=r.get("data") or {}; rows=d.get(key) or []
+        out+=rows; skip+=len(rows)
+        if len(rows)<HISTORY_LIMIT or skip>=int(d.get("total") or 0): return out
+
+def fetch_fills(c,symbol,plan,force=False):
+    # the order-history and trade rows at or after the plan's cursor; "idle" when nothing is resting (and not
+    # forced), None if a page failed. Read-only, so it can run alongside the other snapshot fetches.
+    meta=plan.get("meta") or {}; cur=meta.get("fill_cursor") or {}
+    if not force and not plan_index(plan).count("PLACED"): return "idle"
+    start=int(meta.get("created") or time.time())*1000
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        t=ex.submit(history_pages,c.history_trades,"tradeList",symbol,int(cur.get("trades") or start))
+        o=ex.submit(history_pages,c.history_orders,"orderList",symbol,int(cur.get("orders") or start))
+        trades,orders=t.result(),o.result()
+    return None if trades is None or orders is None else (trades,orders)
+
+def _settle(ix,plan,i,o,out):
+    # a terminal order row (history or order detail) -> its level FILLED, back to PENDING, or left alone if still live
+    L=plan["levels"][i]; st=str(o.get("status","")).upper(); done=float(o.get("tradeQty") or L.get("fill_qty") or 0)
+    gone=st.startswith("CANCEL") or st in ("EXPIRED","REJECTED")
+    if st=="FILLED" or (gone and done>0):
+        # a cancelled order that partly filled still moved the position: its level is spent
+        px=float(o.get("avgPrice") or 0) or L.get("fill_price") or L["price"]
+        ix.set_status(i,"FILLED",fill_qty=done or float(o.get("qty") or L.get("qty") or 0),fill_price=px,filled_at=int(o.get("mtime") or 0))
+        L.pop("fill_value",None); out["filled"]+=1
+    elif gone:
+        ix.set_status(i,"PENDING",orderId=None,clientId=None,qty=None)
+        for k in ("fill_qty","fill_price","fill_value"): L.pop(k,None)
+        out["canceled"]+=1
+
+def reconcile_fills(c,symbol,plan,fetched=False,pending=None):
+    # Incremental: only order-history and trade rows at or after the plan's cursor are used. Trades on resting
+    # orders are recorded as partial fills, and a level whose trades add up to its qty is FILLED; terminal orders move
+    # their level to FILLED (with fill price/qty), or back to PENDING when cancelled with nothing filled. Levels
+    # without new events are not touched. pending (an open-orders reply) catches what the cursor cannot: the exchange
+    # pages order history by create time, so an old order cancelled after the cursor moved on is never returned.
+    # Each PLACED level whose order is neither open nor settled above is looked up with order_detail.
+    if fetched is False: fetched=fetch_fills(c,symbol,plan)
+    meta=plan.setdefault("meta",{}); cur=meta.setdefault("fill_cursor",{})
+    ix=plan_index(plan); out={"filled":0,"partial":0,"canceled":0}
+    by_oid={plan["levels"][i]["orderId"]:i for side in ("BUY","SELL") for i in ix.ids(side,"PLACED")}
+    if fetched=="idle":
+        # nothing resting: no calls were made; move the cursor up to now (minus slack for clock skew)
+        t=int(time.time()*1000)-60000; cur["orders"]=max(int(cur.get("orders") or 0),t); cur["trades"]=max(int(cur.get("trades") or 0),t); cur["trade_ids"]=[]
+        return plan,out
+    if fetched is None: return plan,None   # leave the plan alone; the next tick retries from the same cursor
+    trades,orders=fetched
+    seen=set(cur.get("trade_ids") or []); traded={}
+    for t in sorted(trades,key=lambda t: int(t.get("ctime") or 0)):
+        ts=int(t.get("ctime") or 0); tid=str(t.get("tradeId"))
+        if ts>int(cur.get("trades") or 0): cur["trades"]=ts; seen=set()
+        if ts==int(cur.get("trades") or 0):
+            if tid in seen: continue
+            seen.add(tid)
+        i=by_oid.get(t.get("orderId"))
+        if i is None: continue
+        L=plan["levels"][i]; q=float(t.get("qty") or 0)
+        L["fill_value"]=float(L.get("fill_value") or 0)+q*float(t.get("price") or L["price"]); L["fill_qty"]=float(L.get("fill_qty") or 0)+q
+        L["fill_price"]=round(L["fill_value"]/L["fill_qty"],8) if L["fill_qty"] else None; ix.touch(i); traded[i]=ts
+    cur["trade_ids"]=sorted(seen)
+    for o in orders:
+        cur["orders"]=max(int(cur.get("orders") or 0),int(o.get("mtime") or o.get("ctime") or 0))
+        i=by_oid.get(o.get("orderId"))
+        if i is None or plan["levels"][i]["status"]!="PLACED": continue
+        _settle(ix,plan,i,o,out)
+    for i,ts in traded.items():
+        # Trades alone complete a level too: an exchange that pages order history by create time never returns an
+        # order that filled after the cursor passed its creation, but its trades still arrive.
+        L=plan["levels"][i]
+        if L["status"]=="PLACED" and L.get("qty") and float(L.get("fill_qty") or 0)>=float(L["qty"])-1e-9:
+            ix.set_status(i,"FILLED",filled_at=ts); L.pop("fill_value",None); out["filled"]+=1
+    if pending is not None and pending.get("code")==0:
+        resting={o.get("orderId") for o in pending.get("data") or []}
+        for i in [i for side in ("BUY","SELL") for i in ix.ids(side,"PLACED") if plan["levels"][i]["orderId"] not in resting]:
+            r=c.order_detail(order_id=plan["levels"][i]["orderId"])
+            if r.get("code")==0: _settle(ix,plan,i,_first_row_like(r.get("data")),out)
+    out["partial"]=sum(1 for side in ("BUY","SELL") for i in ix.ids(side,"PLACED") if plan["levels"][i].get("fill_qty"))
+    return plan,out
+
+def place_all(c,bodies,workers=1,batch=0,journal=None):
+    # results line up with bodies; the client's token bucket keeps the fan-out inside the rate budget
+    if journal is not None and bodies: journal.write(bodies)
+    if batch:
+        chunks=[bodies[i:i+batch] for i in range(0,len(bodies),batch)]
+        if workers<=1 or len(chunks)<=1: return [r for ch in chunks for r in c.place_batch(ch,batch)]
+        with ThreadPoolExecutor(max_workers=min(workers,len(chunks))) as ex: return [r for rs in ex.map(lambda ch: c.place_batch(ch,batch),chunks) for r in rs]
+    if workers<=1 or len(bodies)<=1: return [c.place(b) for b in bodies]
+    with ThreadPoolExecutor(max_workers=min(workers,len(bodies))) as ex: return list(ex.map(c.place,bodies))
+
+def batch_size(cfg): return int(cfg.get("batchSize",20)) if cfg.get("batchOrders") else 0
+
+def _shrunk(b,f,min_vol,base_prec,new_id=False):
+    b={**b,"qty":str(max(min_vol, round_qty(float(b["qty"])*f, base_prec)))}
+    if new_id: b["clientId"]=next_client_id(b["clientId"])
+    return b
+
+def place_buys(c,bodies,min_vol,base_prec,workers=1,batch=0,journal=None):
+    # 20003 fallback: shrink by 15% and re-send; bodies is updated in place so callers see the qty that went out.
+    # Returns (results, every body sent) so the caller can advance attempts past the retried ids too.
+    sent=[]
+    if workers<=1 and not batch:
+        res=[]; f=1.0
+        for i in range(len(bodies)):
+            if f<1.0: bodies[i]=_shrunk(bodies[i],f,min_vol,base_prec)
+            r=place_all(c,[bodies[i]],journal=journal)[0]; sent.append(bodies[i])
+            if r.get("code")==20003:
+                f*=0.85; bodies[i]=_shrunk(bodies[i],0.85,min_vol,base_prec,True); r=place_all(c,[bodies[i]],journal=journal)[0]; sent.append(bodies[i])
+            res.append(r)
+        return res,sent
+    res=place_all(c,bodies,workers,batch,journal); sent+=bodies
+    rej=[i for i,r in enumerate(res) if r.get("code")==20003]
+    if rej:
+        # one shrink for the whole wave, then only the rejected levels are re-sent
+        for i in rej: bodies[i]=_shrunk(bodies[i],0.85,min_vol,base_prec,True)
+        retry=[bodies[i] for i in rej]; sent+=retry
+        for i,r in zip(rej,place_all(c,retry,workers,batch,journal)): res[i]=r
+    return res,sent
+
+def recover_intents(c,symbol,plan,pending=None):
+    # Rebuild what a crashed tick sent but never saved: each journalled id is matched to a live order by clientId;
+    # ids that are not live are looked up one by one (filled in the meantime, or never accepted).
+    j=journal(symbol)
+    if not j.pending(): return None
+    pid=plan_id(plan); rows=[r for r in j.read() if (cid_parts(r.get("clientId")) or ("",))[0]==pid]
+    out={"intents":len(rows),"placed":0,"filled":0,"lost":0}
+    if not rows: return out
+    pend=pending if pending is not None else c.pending_orders(symbol)
+    live={o.get("clientId"):o for o in (pend.get("data") or [])} if pend.get("code")==0 else {}
+    ix=plan_index(plan)
+    for r in rows:
+        _,i,a=cid_parts(r["clientId"])
+        if i>=len(plan["levels"]): continue
+        L=plan["levels"][i]; L["attempt"]=max(int(L.get("attempt") or 0),a); ix.touch(i)
+        if L.get("clientId")==r["clientId"]: continue   # outcome already saved; the tick's reconcile owns it now
+        o=live.get(r["clientId"])
+        if o is not None:
+            ix.set_status(i,"PLACED",orderId=o["orderId"],qty=float(o.get("qty") or r["qty"]),clientId=r["clientId"]); out["placed"]+=1; continue
+        d=c.order_detail(client_id=r["clientId"]); row=_first_row_like(d.get("data")) if d.get("code")==0 else {}
+        if str(row.get("status","")).upper()=="FILLED":
+            ix.set_status(i,"FILLED",orderId=row.get("orderId"),qty=float(row.get("qty") or r["qty"]),clientId=r["clientId"]); out["filled"]+=1
+        else: out["lost"]+=1
+    return out
+
+def tick_execute(c, cfg, plan, band_pct=None, max_place=None, account=None, marks=None, positions=None):
+    # account=(available, frozen), marks={symbol: mark} and positions (this symbol's positions reply) let tick_cycle
+    # share one fetch across symbols
+    span=METRICS.span; jr=journal(cfg["symbol"]); recovering=jr.pending()
+    # open orders are read whenever something rests (for reconcile_fills) or a crash left intents (for recovery)
+    snap=TickSnapshot(c,cfg,plan,TickSnapshot.KINDS if recovering or plan_index(plan).count("PLACED") else TickSnapshot.KINDS[:-1],account,marks,positions).fetch()
+    if recovering:
+        with span("recover"): rec=recover_intents(c,cfg["symbol"],plan,snap.pending)
+    else: rec=None
+    # fills land before placing, so a cancelled level can go straight back out and filled BUYs free their margin
+    plan,fills=reconcile_fills(c,cfg["symbol"],plan,snap.fills,snap.pending)
+    base_prec,min_vol=snap.base_prec,snap.min_vol; avail,frozen=snap.avail,snap.frozen; cap,cap_src=snap.cap,snap.cap_src
+    if cap is None:
+        return plan, {"cap":None,"hb":None,"lb":None,"qty":None,"placed_buys":0,"placed_sells":0,"fills":fills,"recovered":rec,"error":"cap unavailable"}
+    hb=round(cap*0.999,2); lb=round(hb*(1-(band_pct or cfg.get("bandPct",3.0))/100.0),2)
+    plan.setdefault("meta",{})["last_cap"]={"cap":cap,"hb":hb,"lb":lb,"ts":int(time.time())}
+    if max_place is None: max_place=cfg.get("maxPlacePerTick",12)
+    ix=plan_index(plan)
+    win=ix.range("BUY","PENDING",lb,hb,max_place); buys_window=[plan["levels"][i] for i in win]
+    workers=int(cfg.get("placeConcurrency",1)); batch=batch_size(cfg)
+    lev=plan_leverage(cfg)
+    qtys=size_window(cfg, avail, frozen, lev, plan, [L["price"] for L in buys_window], base_prec, min_vol)
+    win=[i for i,q in zip(win,qtys) if q>0]; qtys=[q for q in qtys if q>0]; buys_window=[plan["levels"][i] for i in win]
+    qty=qtys[0] if qtys else min_vol
+    placed_buys=0; placed_sells=0
+    bodies=[{"symbol":cfg["symbol"],"side":"BUY","tradeSide":"OPEN","orderType":"LIMIT","qty":str(q),"price":str(L["price"]),"effect":cfg["tif"],"reduceOnly":False,"clientId":client_id(plan,i)} for i,L,q in zip(win,buys_window,qtys)]
+    with span("place_buys"): res,sent=place_buys(c,bodies,min_vol,base_prec,workers,batch,jr)
+    note_attempts(plan,sent)
+    rej=[i for i,r in enumerate(res) if r.get("code")==30014]
+    if rej and cap_src=="model":
+        # the modelled cap was too high: re-learn it from the probe and re-send what now fits
+        CACHE.drop(f"band:{cfg['symbol']}")
+        cap2,_=get_buy_cap(c, {**cfg,"capRatio":None}, min_vol, force_probe=True)
+        if cap2 is not None:
+            cap,cap_src=cap2,"probe"; hb=round(cap*0.999,2); rej=[i for i in rej if buys_window[i]["price"]<=hb]
+            for i in rej: bodies[i]={**bodies[i],"clientId":next_client_id(bodies[i]["clientId"])}
+            for i,r in zip(rej,place_all(c,[bodies[i] for i in rej],workers,batch,jr)): res[i]=r
+            note_attempts(plan,[bodies[i] for i in rej])
+    for i,b,r in zip(win,bodies,res):
+        if r.get("code")==0 and r.get("data"):
+            ix.set_status(i,"PLACED",orderId=r["data"]["orderId"],qty=float(b["qty"]),clientId=b["clientId"]); placed_buys+=1
+    if placed_buys: qty=float(bodies[-1]["qty"]); plan.setdefault("meta",{})["last_buy_qty"]=qty
+    else: qty=float((plan.get("meta") or {}).get("last_buy_qty") or qty)   # SELLs mirror the most recent BUY size
+    pos_id,open_qty=snap.long()
+    if open_qty>0:
+        take=ix.lowest("SELL","PENDING",max_place); sq=sell_qtys(qty,sell_room(plan,open_qty),len(take),base_prec,min_vol); take=take[:len(sq)]
+        bodies=[{"symbol":cfg["symbol"],"side":"SELL","tradeSide":"CLOSE","orderType":"LIMIT","qty":str(q),"price":str(plan["levels"][i]["price"]),"effect":cfg["tif"],"reduceOnly":True,"clientId":client_id(plan,i),"positionId":pos_id} for i,q in zip(take,sq)]
+        with span("place_sells"): res=place_all(c,bodies,workers,batch,jr)
+        note_attempts(plan,bodies)
+        for i,b,r in zip(take,bodies,res):
+            if r.get("code")==0 and r.get("data"):
+                ix.set_status(i,"PLACED",orderId=r["data"]["orderId"],qty=float(b["qty"]),clientId=b["clientId"]); placed_sells+=1
+    return plan, {"cap":cap,"cap_src":cap_src,"hb":hb,"lb":lb,"qty":qty,"placed_buys":placed_buys,"placed_sells":placed_sells,"available":avail,"sum_buy_prices":sum([L["price"] for L in buys_window]),"fills":fills,"recovered":rec}
+
+def symbol_cfgs(cfg):
+    # cfg["symbols"]: symbols or {symbol, weight, <any cfg key>} overrides on top of the shared cfg; absent -> cfg["symbol"]
+    out=[]
+    for r in cfg.get("symbols") or [cfg["symbol"]]:
+        r={"symbol":r} if isinstance(r,str) else dict(r)
+        out.append({**{k:v for k,v in cfg.items() if k!="symbols"},**r})
+    return out
+
+def allocate_margin(cfgs, plans, avail, frozen):
+    # One split of the account's free margin by weight (default equal). Plan BUY margin the exchange has not frozen
+    # yet comes off the pool first; each symbol is then handed its own placed margin as "frozen" so size_window's
+    # correction nets to zero instead of being applied once per symbol.
+    placed={x["symbol"]:placed_margin(plans[x["symbol"]],plan_leverage(x)) for x in cfgs}
+    pool=max(0.0,avail-max(0.0,sum(placed.values())-frozen))
+    w={x["symbol"]:max(0.0,float(x.get("weight",1.0))) for x in cfgs}; tw=sum(w.values()) or 1.0
+    return {s:(pool*w[s]/tw,placed[s]) for s in w}
+
+def tick_cycle(c, cfg, plans):
+    # One scheduler pass over every configured symbol: the shared client/pool/limiter, one account read, one tickers
+    # read, one positions read and one rules read for all symbols, margin split once, then the per-symbol ticks run
+    # concurrently.
+    cfgs=symbol_cfgs(cfg); syms=[x["symbol"] for x in cfgs]
+    with METRICS.span("rules"): prefetch_rules(c,syms,cache_ttl(cfg,"rules"))
+    with METRICS.span("account"): avail,acct=get_account(c); _,frozen=account_margin(acct)
+    with METRICS.span("cap"): marks=get_marks(c,syms) if len(syms)>1 else None
+    pos={}
+    if len(syms)>1:
+        with METRICS.span("positions"): r=c.positions()
+        # a failed read is handed to every symbol as is, the same as if its own call had failed
+        pos={s:{**r,"data":[p for p in r.get("data") or [] if p.get("symbol")==s]} if r.get("code")==0 else r for s in syms}
+    alloc=allocate_margin(cfgs,plans,avail,frozen)
+    def one(x):
+        return tick_execute(c,x,plans[x["symbol"]],band_pct=x.get("bandPct",3.0),max_place=x.get("maxPlacePerTick",12),account=alloc[x["symbol"]],marks=marks,positions=pos.get(x["symbol"]))
+    with ThreadPoolExecutor(max_workers=max(1,min(len(cfgs),int(cfg.get("symbolConcurrency",8))))) as ex: out=list(ex.map(one,cfgs))
+    for x,(p,_) in zip(cfgs,out): plans[x["symbol"]]=p
+    return {x["symbol"]:meta for x,(_,meta) in zip(cfgs,out)}
+
+def run_cycle(c, cfg, plans=None):
+    # load -> tick_cycle -> save + log each symbol; the metrics columns and .prom file cover the whole cycle
+    syms=[x["symbol"] for x in symbol_cfgs(cfg)]
+    if plans is None: plans={s:load_plan(s,cfg) for s in syms}
+    metas=tick_cycle(c,cfg,plans)
+    for x in symbol_cfgs(cfg):
+        save_plan(plans[x["symbol"]],x["symbol"],cfg); log_tick(x,plans[x["symbol"]],metas[x["symbol"]],prom=False)
+    write_prom({**cfg,"symbol":",".join(syms)},METRICS.summary())
+    return plans,metas
+
+def apply_regrid(c, cfg, new_plan, old_plan, dry_run=False):
+    # moves a live grid onto new_plan with the minimal cancels/places; returns (plan, diff)
+    sym=cfg["symbol"]
+    snap=TickSnapshot(c,cfg,old_plan,want=("pending","fills") if dry_run else ("rules","pending","positions","fills")).fetch(); pend=snap.pending
+    if not dry_run: recover_intents(c,sym,old_plan,pend)
+    # A plan order that filled since the last tick is no longer pending; unless its level is FILLED before the diff,
+    # the new plan gets that level back as PENDING and buys it again. reconcile_fills also looks up any owned order
+    # that is neither resting nor in the fill history yet.
+    reconcile_fills(c,sym,old_plan,snap.fills,pend)
+    live=pend.get("data") or [] if pend.get("code")==0 else []
+    d=regrid_diff(new_plan,old_plan,live,cfg.get("maxPlacePerTick",12))
+    if dry_run: return new_plan,d
+    ix=plan_index(new_plan)
+    for i in d["carry_filled"]: ix.set_status(i,"FILLED")
+    for o in d["ops"]:
+        if o["action"]=="keep": ix.set_status(o["idx"],"PLACED",orderId=o["orderId"],qty=o.get("qty"),clientId=o.get("clientId"))
+    new_plan.setdefault("meta",{})["last_buy_qty"]=(old_plan.get("meta") or {}).get("last_buy_qty")
+    ids=[{"orderId":o["orderId"],"symbol":sym} for o in d["ops"] if o["action"]=="cancel"]
+    if ids: d["cancel_result"]=c.cancel_batch(ids,batch_size(cfg) or 20)
+    place=[o for o in d["ops"] if o["action"]=="place"]
+    if place:
+        base_prec,min_vol=snap.base_prec,snap.min_vol
+        workers=int(cfg.get("placeConcurrency",1)); batch=batch_size(cfg)
+        lev=plan_leverage(cfg)
+        buys=[o for o in place if o["side"]=="BUY"]; sells=[o for o in place if o["side"]=="SELL"]
+        bodies=[]; idxs=[]
+        if buys:
+            avail,acct=get_account(c); _,frozen=account_margin(acct)   # read after the cancels, which free margin
+            qtys=size_window(cfg,avail,frozen,lev,new_plan,[o["price"] for o in buys],base_prec,min_vol)
+            for o,q in zip(buys,qtys):
+                if q>0: idxs.append(o["idx"]); bodies.append({"symbol":sym,"side":"BUY","tradeSide":"OPEN","orderType":"LIMIT","qty":str(q),"price":str(o["price"]),"effect":cfg["tif"],"reduceOnly":False,"clientId":client_id(new_plan,o["idx"])})
+        if sells:
+            pos_id,open_qty=snap.long()
+            sq=sell_qtys(float(new_plan["meta"].get("last_buy_qty") or min_vol),sell_room(new_plan,open_qty),len(sells),base_prec,min_vol)
+            for o,q in zip(sells,sq):
+                idxs.append(o["idx"]); bodies.append({"symbol":sym,"side":"SELL","tradeSide":"CLOSE","orderType":"LIMIT","qty":str(q),"price":str(o["price"]),"effect":cfg["tif"],"reduceOnly":True,"clientId":client_id(new_plan,o["idx"]),"positionId":pos_id})
+        res=place_all(c,bodies,workers,batch,journal(sym)); placed=0
+        note_attempts(new_plan,bodies)
+        for i,b,r in zip(idxs,bodies,res):
+            if r.get("code")==0 and r.get("data"): ix.set_status(i,"PLACED",orderId=r["data"]["orderId"],qty=float(b["qty"]),clientId=b["clientId"]); placed+=1
+        d["placed"]=placed
+    return new_plan,d
@@ -0,0 +1,140 @@
+# Plan history: each saved tick's level transitions (idx, from, to, orderId) in history.db, instead of full copies.
+# A plan's side/price layout is stored once, a compressed checkpoint of every level's (status, orderId) when the plan
+# is first seen and then every history.checkpointEvery recorded ticks, so rebuilding the plan at any past tick reads
+# one checkpoint and at most that many ticks of transitions. Ticks that change nothing are not recorded.
+import os, csv, json, time, zlib, datetime, threading
+from . import config
+from .plan import plan_id
+
+STATUSES=("PENDING","PLACED","FILLED")
+_CODE={s:i for i,s in enumerate(STATUSES)}
+CHECKPOINT_EVERY=1000
+
+def history_cfg(cfg=None):
+    h=(cfg if cfg is not None else (config.load_cfg() or {})).get("history")
+    return {"enabled":True,"checkpointEvery":CHECKPOINT_EVERY,**(h if isinstance(h,dict) else {} if h is None else {"enabled":bool(h)})}
+
+def _pack(v): return zlib.compress(json.dumps(v,separators=(',',':')).encode())
+def _unpack(b): return json.loads(zlib.decompress(b))
+
+def _epoch(t):
+    # ISO date/time (UTC unless it says otherwise) or epoch seconds -> epoch seconds
+    if t is None or isinstance(t,(int,float)): return t
+    d=datetime.datetime.fromisoformat(str(t))
+    return int((d if d.tzinfo else d.replace(tzinfo=datetime.UTC)).timestamp())
+
+class PlanHistory:
+    def __init__(self,path): self.path=path; self.lock=threading.Lock(); self._last={}   # plan pk -> (tick, state)
+    def _db(self):
+        import sqlite3
+        db=sqlite3.connect(self.path)
+        db.executescript("""PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;
+        CREATE TABLE IF NOT EXISTS plans(pk INTEGER PRIMARY KEY, plan_id TEXT, symbol TEXT, n INTEGER, layout BLOB, UNIQUE(plan_id,n));
+        CREATE TABLE IF NOT EXISTS ticks(tick INTEGER PRIMARY KEY, plan INTEGER, symbol TEXT, ts INTEGER);
+        CREATE INDEX IF NOT EXISTS ticks_plan ON ticks(plan);
+        CREATE INDEX IF NOT EXISTS ticks_symbol_ts ON ticks(symbol,ts);
+        CREATE TABLE IF NOT EXISTS transitions(tick INTEGER, idx INTEGER, old INTEGER, new INTEGER, orderId TEXT, PRIMARY KEY(tick,idx)) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS checkpoints(plan INTEGER, tick INTEGER, state BLOB, PRIMARY KEY(plan,tick)) WITHOUT ROWID;""")
+        return db
+
+    def _state(self, db, pk, tick):
+        # every level's [status code, orderId] of plan pk as of `tick`: the checkpoint at/before it plus the transitions since
+        base,state=db.execute("SELECT tick,state FROM checkpoints WHERE plan=? AND tick<=? ORDER BY tick DESC LIMIT 1",(pk,tick)).fetchone()
+        state=_unpack(state)
+        for idx,new,oid in db.execute("""SELECT t.idx,t.new,t.orderId FROM transitions t JOIN ticks k ON k.tick=t.tick
+                                        WHERE k.plan=? AND t.tick>? AND t.tick<=? ORDER BY t.tick""",(pk,base,tick)):
+            if idx<len(state): state[idx]=[new,oid]
+        return state
+
+    def record(self, plan, ts=None, every=CHECKPOINT_EVERY):
+        # Diff the plan against its last recorded state and store the differences as one tick; returns the tick id, or
+        # None when nothing changed. The last state is kept in memory per plan and rebuilt from the db when another
+        # process recorded since (or on first use), so nothing depends on how the plan was edited in between.
+        # A plan id not seen before (or whose level count changed, which gets a layout of its own) is checkpointed whole.
+        levels=plan["levels"]; pid=plan_id(plan); ts=int(ts or time.time())
+        cur=[[_CODE[L["status"]],L.get("orderId")] for L in levels]
+        with self.lock:
+            db=self._db()
+            try:
+                with db:
+                    known=db.execute("SELECT pk FROM plans WHERE plan_id=? AND n=?",(pid,len(levels))).fetchone()
+                    if not known:
+                        pk=db.execute("INSERT INTO plans(plan_id,symbol,n,layout) VALUES(?,?,?,?)",(pid,plan.get("symbol"),len(levels),_pack([[L["side"],L["price"]] for L in levels]))).lastrowid
+                        rows=[]; ckpt=True
+                    else:
+                        pk=known[0]
+                        head=db.execute("SELECT MAX(tick) FROM ticks WHERE plan=?",(pk,)).fetchone()[0]
+                        last_tick,prev=self._last.get(pk,(None,None))
+                        if last_tick!=head: prev=self._state(db,pk,head)
+                        if prev==cur: self._last[pk]=(head,prev); return None
+                        rows=[(i,p[0],c[0],c[1]) for i,(p,c) in enumerate(zip(prev,cur)) if p!=c]
+                        last=db.execute("SELECT MAX(tick) FROM checkpoints WHERE plan=?",(pk,)).fetchone()[0] or 0
+                        ckpt=db.execute("SELECT COUNT(*) FROM ticks WHERE plan=? AND tick>?",(pk,last)).fetchone()[0]+1>=every
+                    tick=db.execute("INSERT INTO ticks(plan,symbol,ts) VALUES(?,?,?)",(pk,plan.get("symbol"),ts)).lastrowid
+                    db.executemany("INSERT INTO transitions(tick,idx,old,new,orderId) VALUES(?,?,?,?,?)",[(tick,*r) for r in rows])
+                    if ckpt: db.execute("INSERT INTO checkpoints(plan,tick,state) VALUES(?,?,?)",(pk,tick,_pack(cur)))
+                self._last[pk]=(tick,cur)   # only once committed
+                return tick
+            finally: db.close()
+
+    def find(self, tick=None, symbol=None, at=None):
+        # (tick, plan pk, plan id, symbol, ts) for a tick id, or the last tick at/before `at` (for `symbol`)
+        q="SELECT k.tick,k.plan,p.plan_id,k.symbol,k.ts FROM ticks k JOIN plans p ON p.pk=k.plan"
+        db=self._db()
+        try:
+            if tick is not None: return db.execute(q+" WHERE k.tick=?",(int(tick),)).fetchone()
+            w=[]; a=[]
+            if symbol: w.append("k.symbol=?"); a.append(symbol)
+            if at is not None: w.append("k.ts<=?"); a.append(_epoch(at))
+            order=" ORDER BY k.ts DESC,k.tick DESC" if symbol else " ORDER BY k.tick DESC"   # lets (symbol, ts) serve the lookup
+            return db.execute(q+(" WHERE "+" AND ".join(w) if w else "")+order+" LIMIT 1",a).fetchone()
+        finally: db.close()
+
+    def at(self, tick=None, symbol=None, at=None):
+        # The plan as saved at that tick: levels carry side, price, status and orderId (qty and fill details are
+        # not kept). None when there is no such tick.
+        row=self.find(tick,symbol,at)
+        if row is None: return None
+        tick,pk,pid,sym,ts=row
+        db=self._db()
+        try: layout=_unpack(db.execute("SELECT layout FROM plans WHERE pk=?",(pk,)).fetchone()[0]); state=self._state(db,pk,tick)
+        finally: db.close()
+        levels=[{"side":sd,"price":px,"status":STATUSES[st],"orderId":oid} for (sd,px),(st,oid) in zip(layout,state)]
+        return {"symbol":sym,"levels":levels,"meta":{"id":pid,"history_tick":tick,"history_ts":ts}}
+
+    def ticks(self, symbol=None, since=None, until=None, limit=None):
+        # [(tick, plan id, symbol, ts, transitions)] oldest first
+        w=[]; a=[]
+        if symbol: w.append("k.symbol=?"); a.append(symbol)
+        if since is not None: w.append("k.ts>=?"); a.append(_epoch(since))
+        if until is not None: w.append("k.ts<?"); a.append(_epoch(until))
+        q=("SELECT k.tick,p.plan_id,k.symbol,k.ts,(SELECT COUNT(*) FROM transitions t WHERE t.tick=k.tick) FROM ticks k JOIN plans p ON p.pk=k.plan"
+           +(" WHERE "+" AND ".join(w) if w else "")+" ORDER BY k.tick"+(f" LIMIT {int(limit)}" if limit else ""))
+        db=self._db()
+        try: return db.execute(q,a).fetchall()
+        finally: db.close()
+
+    def export_csv(self, path, symbol=None, since=None, until=None):
+        # one row per level transition in [since, until), streamed in tick order; returns the row count
+        w=["1"]; a=[]
+        if symbol: w.append("k.symbol=?"); a.append(symbol)
+        if since is not None: w.append("k.ts>=?"); a.append(_epoch(since))
+        if until is not None: w.append("k.ts<?"); a.append(_epoch(until))
+        db=self._db(); layouts={}; n=0
+        try:
+            with open(path,"w",newline="") as f:
+                out=csv.writer(f)
+                out.writerow(["ts_iso","tick","symbol","plan_id","idx","side","price","from_status","to_status","orderId"])
+                for tick,ts,sym,pk,pid,idx,old,new,oid in db.execute("""SELECT k.tick,k.ts,k.symbol,k.plan,p.plan_id,t.idx,t.old,t.new,t.orderId
+                        FROM transitions t JOIN ticks k ON k.tick=t.tick JOIN plans p ON p.pk=k.plan WHERE """+" AND ".join(w)+" ORDER BY t.tick,t.idx",a):
+                    if pk not in layouts: layouts[pk]=_unpack(db.execute("SELECT layout FROM plans WHERE pk=?",(pk,)).fetchone()[0])
+                    sd,px=layouts[pk][idx] if idx<len(layouts[pk]) else (None,None)
+                    out.writerow([datetime.datetime.fromtimestamp(ts,datetime.UTC).isoformat(),tick,sym,pid,idx,sd,px,STATUSES[old],STATUSES[new],oid or ""]); n+=1
+        finally: db.close()
+        return n
+
+_HISTORY={}
+def plan_history():
+    path=os.path.join(config.APPDIR,"history.db")
+    if path not in _HISTORY: _HISTORY[path]=PlanHistory(path)
+    return _HISTORY[path]
@@ -0,0 +1,33 @@
+# Per-tick timing spans and API call stats, shared by the client and the tick engine.
+import time, threading, contextlib
+
+class TickMetrics:
+    # Timing spans and per-endpoint API stats for one tick; reset() at tick start, summary() when it is logged.
+    def __init__(self): self.lock=threading.Lock(); self.reset()
+    def reset(self):
+        with self.lock:
+            self.t0=time.perf_counter(); self.calls={}; self.spans={}; self.retries=0; self.errors={}
+    def call(self,endpoint,ms,code):
+        with self.lock:
+            self.calls.setdefault(endpoint,[]).append(ms)
+            if code not in (0,None): self.errors[str(code)]=self.errors.get(str(code),0)+1
+    def retry(self,n=1):
+        with self.lock: self.retries+=n
+    def add(self,name,ms):
+        with self.lock: self.spans[name]=self.spans.get(name,0.0)+ms
+    @contextlib.contextmanager
+    def span(self,name):
+        t=time.perf_counter()
+        try: yield
+        finally: self.add(name,(time.perf_counter()-t)*1000)
+    def summary(self):
+        with self.lock:
+            q=lambda v,p: sorted(v)[min(len(v)-1,int(p*len(v)))]
+            ep={k.rsplit("/",1)[-1]:v for k,v in self.calls.items()}
+            return {"tick_ms":round((time.perf_counter()-self.t0)*1000,1),"requests":sum(len(v) for v in ep.values()),"retries":self.retries,"errors":dict(self.errors),
+                    "api_ms":round(sum(sum(v) for v in ep.values()),1),"sign_ms":round(self.spans.get("sign",0.0),2),
+                    "plan_io_ms":round(self.spans.get("plan_load",0.0)+self.spans.get("plan_save",0.0),1),
+                    "phase_ms":{k:round(v,1) for k,v in self.spans.items() if k not in ("sign","plan_load","plan_save")},
+                    "p50_ms":{k:round(q(v,0.5),1) for k,v in ep.items()},"p95_ms":{k:round(q(v,0.95),1) for k,v in ep.items()},"count":{k:len(v) for k,v in ep.items()}}
+
+METRICS=TickMetrics()
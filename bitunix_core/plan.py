@@ -0,0 +1,289 @@
+# Plan model: the level list, its price/status index and paged views, the yaml/sqlite plan stores, the intent
+# journal and the clientIds that tie every order back to its level. No exchange calls happen here.
+import os, sys, json, time, uuid, bisect, threading, csv, datetime
+from . import config
+from .metrics import METRICS
+
+def make_plan(symbol, lowest_buy, highest_buy, highest_sell, total_levels=50, buy_fraction=0.67):
+    buy_levels=max(2,int(total_levels*buy_fraction)); sell_levels=max(2,total_levels-buy_levels)
+    buys=[round(lowest_buy+i*((highest_buy-lowest_buy)/(buy_levels-1)),2) for i in range(buy_levels)]
+    sells=[round(highest_buy+i*((highest_sell-highest_buy)/(sell_levels-1)),2) for i in range(sell_levels)]
+    levels=[{"side":"BUY","price":p,"status":"PENDING","orderId":None} for p in buys]+[{"side":"SELL","price":p,"status":"PENDING","orderId":None} for p in sells]
+    return {"symbol":symbol,"levels":levels,"meta":{"id":uuid.uuid4().hex[:8],"created":int(time.time()),"lowest_buy":lowest_buy,"highest_buy":highest_buy,"highest_sell":highest_sell,"total":total_levels,"buy_levels":buy_levels,"sell_levels":sell_levels}}
+
+class LevelIndex:
+    # Price-sorted (price, idx) buckets per (side, status) over plan["levels"], with per-status counters.
+    # Status changes must go through set_status so the buckets stay in step with the level dicts. Every level it sets,
+    # and every level edited in place and passed to touch(), is marked dirty; save_plan_db writes only those when
+    # `synced` says the store already holds the rest.
+    __slots__=("levels","buckets","counts","dirty","synced")
+    def __init__(self,levels):
+        self.levels=levels; self.buckets={}; self.counts={}; self.dirty=set(); self.synced=None
+        for i,L in enumerate(levels):
+            self.buckets.setdefault((L["side"],L["status"]),[]).append((L["price"],i))
+            self.counts[L["status"]]=self.counts.get(L["status"],0)+1
+        for b in self.buckets.values(): b.sort()   # make_plan output is already sorted, so this is linear
+    def range(self,side,status,lo,hi,limit=None):
+        b=self.buckets.get((side,status),[])
+        a=bisect.bisect_left(b,(lo,-1)); z=bisect.bisect_right(b,(hi,len(self.levels)))
+        if limit is not None: z=min(z,a+limit)
+        return [i for _,i in b[a:z]]
+    def lowest(self,side,status,n): return [i for _,i in self.buckets.get((side,status),[])[:n]]
+    def ids(self,side,status): return [i for _,i in self.buckets.get((side,status),[])]
+    def count(self,status): return self.counts.get(status,0)
+    def set_status(self,i,status,**fields):
+        L=self.levels[i]; old=L["status"]
+        if old!=status:
+            b=self.buckets[(L["side"],old)]; del b[bisect.bisect_left(b,(L["price"],i))]
+            bisect.insort(self.buckets.setdefault((L["side"],status),[]),(L["price"],i))
+            self.counts[old]-=1; self.counts[status]=self.counts.get(status,0)+1
+            L["status"]=status
+        L.update(fields); self.dirty.add(i)
+    def touch(self,i): self.dirty.add(i)
+    def stats(self):
+        t=len(self.levels); filled=self.count("FILLED"); placed=self.count("PLACED")
+        return {"total":t,"placed":placed,"filled":filled,"pending":t-filled-placed}
+    def by_side(self): return {f"{side}_{status}".lower():len(b) for (side,status),b in sorted(self.buckets.items()) if b}
+    def view(self,sides=("BUY","SELL"),statuses=("PENDING","PLACED","FILLED"),lo=None,hi=None,limit=40,around=None,after=None):
+        # (matching, rows) for the filter in price order, touching only bisect bounds and at most limit entries per
+        # bucket. around=price centres the page on that price; after=(price, idx) continues past a previous page.
+        n=len(self.levels); matching=0; cand=[]
+        for k in [(sd,st) for sd in sides for st in statuses]:
+            b=self.buckets.get(k)
+            if not b: continue
+            a=0 if lo is None else bisect.bisect_left(b,(lo,-1)); z=len(b) if hi is None else bisect.bisect_right(b,(hi,n))
+            matching+=max(0,z-a)
+            if after is not None: a=max(a,bisect.bisect_right(b,tuple(after)))
+            if around is not None:
+                c=min(max(bisect.bisect_left(b,(around,-1)),a),z); cand+=b[max(a,c-limit):min(z,c+limit)]
+            else: cand+=b[a:min(z,a+limit+1)]
+        cand.sort()
+        if around is not None:
+            c=bisect.bisect_left(cand,(around,-1)); a=max(0,min(c-limit//2,len(cand)-limit)); rows=cand[a:a+limit]
+        else: rows=cand[:limit]
+        more=len(cand)>limit if around is None else None
+        return matching,[i for _,i in rows],(rows[-1] if rows and more else None)
+
+_INDEX={}; _INDEX_LOCK=threading.Lock()
+def plan_index(plan):
+    # one index per live plan dict, so repeated calls within a tick (or a long-running process) stay O(1). Past 32
+    # entries only plans the cache alone still references are dropped: an index someone holds is never swapped for
+    # a fresh one behind their back, however many symbols tick at once.
+    ent=_INDEX.get(id(plan))
+    if ent and ent[0] is plan and ent[1].levels is plan["levels"] and len(ent[1].levels)==len(plan["levels"]): return ent[1]
+    with _INDEX_LOCK:
+        if len(_INDEX)>32:
+            for k in [k for k,e in _INDEX.items() if sys.getrefcount(e[0])<=2]: del _INDEX[k]   # the tuple + the call's own ref
+        ix=LevelIndex(plan["levels"]); _INDEX[id(plan)]=(plan,ix)
+    return ix
+
+def plan_stats(plan): return plan_index(plan).stats()
+
+def status_view(plan, side=None, status=None, lo=None, hi=None, limit=40, around="cap", after=None):
+    # One page of levels plus the counters for the header; nothing here walks the whole plan. around="cap" centres
+    # the page on the last tick's cap when no price filter or cursor is given.
+    ix=plan_index(plan); last=(plan.get("meta") or {}).get("last_cap") or {}
+    if around=="cap": around=last.get("hb") if lo is None and hi is None and after is None else None
+    sides=(side.upper(),) if side else ("BUY","SELL"); statuses=(status.upper(),) if status else ("PENDING","PLACED","FILLED")
+    matching,rows,nxt=ix.view(sides,statuses,lo,hi,limit,around,after)
+    return {"symbol":plan.get("symbol"),"stats":ix.stats(),"by_side":ix.by_side(),"cap":last or None,"matching":matching,"around":around,
+            "levels":[{"idx":i,**{k:v for k,v in plan["levels"][i].items() if k!="fill_value"}} for i in rows],
+            "next":f"{nxt[0]}:{nxt[1]}" if nxt else None}
+
+def parse_cursor(s):
+    # "price:idx" from a previous page's "next"
+    p,i=str(s).rsplit(":",1); return (float(p),int(i))
+
+def regrid_diff(new_plan, old_plan, pending, max_place=12):
+    # Desired-state diff: plan orders resting at a (side, price) the new plan still has are kept and handed to the
+    # new level; the rest are cancelled; new PENDING levels inside the price span the live orders covered are placed.
+    # FILLED state carries over by (side, price) too. Orders the old plan does not own are left alone.
+    key=lambda L: (L["side"],round(float(L["price"]),2))
+    new_at={}
+    for i,L in enumerate(new_plan["levels"]): new_at.setdefault(key(L),i)
+    owned={L["orderId"]:L for L in old_plan["levels"] if L.get("orderId") and L["status"]=="PLACED"}
+    keep=[]; cancel=[]; claimed=set(); span={}
+    for o in pending:
+        L=owned.get(o.get("orderId"))
+        if L is None: continue
+        k=key(L); lo,hi=span.get(L["side"],(k[1],k[1])); span[L["side"]]=(min(lo,k[1]),max(hi,k[1]))
+        i=new_at.get(k)
+        if i is not None and i not in claimed and new_plan["levels"][i]["status"]=="PENDING":
+            claimed.add(i); keep.append({"action":"keep","side":k[0],"price":k[1],"idx":i,"orderId":o["orderId"],"qty":L.get("qty"),"clientId":L.get("clientId")})
+        else: cancel.append({"action":"cancel","side":k[0],"price":k[1],"orderId":o["orderId"],"qty":L.get("qty")})
+    filled=[new_at[key(L)] for L in old_plan["levels"] if L["status"]=="FILLED" and key(L) in new_at]
+    place=[]
+    for side,(lo,hi) in span.items():
+        cand=[i for i,L in enumerate(new_plan["levels"]) if L["side"]==side and L["status"]=="PENDING" and lo<=L["price"]<=hi and i not in claimed and i not in filled]
+        place+=[{"action":"place","side":side,"price":new_plan["levels"][i]["price"],"idx":i} for i in sorted(cand,key=lambda i: new_plan["levels"][i]["price"])[:max_place]]
+    ops=sorted(keep+cancel+place,key=lambda d: (d["price"],d["action"]))
+    return {"ops":ops,"keep":len(keep),"cancel":len(cancel),"place":len(place),"carry_filled":filled}
+
+def load_plan_yaml(path=None):
+    import yaml
+    return yaml.safe_load(open(path or config.PLAN))
+
+def save_plan_yaml(p,path=None):
+    import yaml
+    # write-then-rename so a killed tick leaves the previous plan intact
+    path=path or config.PLAN; tmp=path+".tmp"
+    with open(tmp,"w") as f:
+        yaml.safe_dump(p,f); f.flush(); os.fsync(f.fileno())
+    os.replace(tmp,path)
+
+LEVEL_COLS=("side","price","status","orderId")
+
+def _plan_db(path=None):
+    import sqlite3
+    db=sqlite3.connect(path or config.PLANDB)
+    db.executescript("""PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;
+    CREATE TABLE IF NOT EXISTS plan_meta(key TEXT PRIMARY KEY, value TEXT);
+    CREATE TABLE IF NOT EXISTS levels(idx INTEGER PRIMARY KEY, side TEXT, price REAL, status TEXT, orderId TEXT, extra TEXT);
+    CREATE INDEX IF NOT EXISTS levels_side_status_price ON levels(side,status,price);""")
+    return db
+
+def load_plan_db(path=None):
+    db=_plan_db(path)
+    try:
+        meta=dict(db.execute("SELECT key,value FROM plan_meta"))
+        if "symbol" not in meta: return None
+        levels=[]
+        for side,price,status,oid,extra in db.execute("SELECT side,price,status,orderId,extra FROM levels ORDER BY idx"):
+            L={"side":side,"price":price,"status":status,"orderId":oid}
+            if extra: L.update(json.loads(extra))
+            levels.append(L)
+        p={"symbol":json.loads(meta["symbol"]),"levels":levels,"meta":json.loads(meta.get("meta","{}"))}
+        plan_index(p).synced=(path or config.PLANDB,meta.get("gen"))
+        return p
+    finally: db.close()
+
+def save_plan_db(p,path=None):
+    # One transaction. Only the index's dirty levels are written when this plan was loaded from (or last saved to) this
+    # file and nothing else has saved over it since, which the per-save "gen" token tells; otherwise every level is.
+    path=path or config.PLANDB; ix=plan_index(p); gen=uuid.uuid4().hex
+    db=_plan_db(path)
+    try:
+        with db:
+            cur=db.execute("SELECT value FROM plan_meta WHERE key='gen'").fetchone()
+            full=ix.synced!=(path,cur and cur[0])
+            rows=[(i,L["side"],L["price"],L["status"],L.get("orderId"),json.dumps({k:v for k,v in L.items() if k not in LEVEL_COLS}) if len(L)>len(LEVEL_COLS) else None)
+                  for i,L in (enumerate(p["levels"]) if full else ((i,p["levels"][i]) for i in sorted(ix.dirty)))]
+            db.executemany("INSERT INTO plan_meta(key,value) VALUES(?,?) ON CONFLICT(key) DO UPDATE SET value=excluded.value",[("symbol",json.dumps(p["symbol"])),("meta",json.dumps(p.get("meta") or {})),("gen",gen)])
+            db.executemany("""INSERT INTO levels(idx,side,price,status,orderId,extra) VALUES(?,?,?,?,?,?)
+                ON CONFLICT(idx) DO UPDATE SET side=excluded.side,price=excluded.price,status=excluded.status,orderId=excluded.orderId,extra=excluded.extra
+                WHERE side IS NOT excluded.side OR price IS NOT excluded.price OR status IS NOT excluded.status OR orderId IS NOT excluded.orderId OR extra IS NOT excluded.extra""",rows)
+            if full: db.execute("DELETE FROM levels WHERE idx>=?",(len(p["levels"]),))
+        ix.dirty.clear(); ix.synced=(path,gen)   # only once committed
+    finally: db.close()
+
+def plan_store(cfg=None): return (cfg if cfg is not None else config.load_cfg() or {}).get("planStore","yaml")
+
+def plan_paths(symbol=None,cfg=None):
+    # the primary cfg["symbol"] keeps plan.yaml/plan.db; every other symbol gets plan-<SYMBOL>.yaml/.db beside them
+    if symbol is None or symbol==(cfg if cfg is not None else config.load_cfg() or {}).get("symbol"): return config.PLAN,config.PLANDB
+    return os.path.join(config.APPDIR,f"plan-{symbol}.yaml"),os.path.join(config.APPDIR,f"plan-{symbol}.db")
+
+# cfg, when the caller already has it, saves re-reading config.yaml on every load/save
+def load_plan(symbol=None,cfg=None):
+    cfg=cfg if cfg is not None else config.load_cfg() or {}
+    with METRICS.span("plan_load"):
+        p=_load_plan(symbol,cfg)
+        if not (p.get("meta") or {}).get("id"):
+            # Older plans (and the empty default) carry no id. Persist one now, before any clientId or history row is
+            # derived from it: an id that only lived in memory would strand a crashed tick's journal and split history.
+            plan_id(p); _save_plan(p,symbol,cfg)
+        return p
+
+def save_plan(p,symbol=None,cfg=None):
+    from .history import plan_history, history_cfg
+    with METRICS.span("plan_save"):
+        cfg=cfg if cfg is not None else config.load_cfg() or {}
+        plan_id(p); _save_plan(p,symbol,cfg)   # the id reaches disk with the plan, never first in history
+        h=history_cfg(cfg)
+        if h["enabled"]: plan_history().record(p,every=int(h["checkpointEvery"]))   # only once the plan itself is on disk
+    journal(symbol or p.get("symbol")).clear()   # every journalled send is now reflected in the saved plan
+
+def _load_plan(symbol,cfg):
+    y,db=plan_paths(symbol,cfg)
+    if plan_store(cfg)=="sqlite":
+        p=load_plan_db(db)
+        if p is not None: return p
+        if not os.path.exists(y): return {"symbol":symbol,"levels":[],"meta":{"created":int(time.time())}}
+        p=load_plan_yaml(y); save_plan_db(p,db); return p   # first run on sqlite: import the existing plan.yaml
+    if not os.path.exists(y): return {"symbol":symbol,"levels":[],"meta":{"created":int(time.time())}}
+    return load_plan_yaml(y)
+
+def _save_plan(p,symbol,cfg):
+    y,db=plan_paths(symbol,cfg)
+    if plan_store(cfg)=="sqlite": save_plan_db(p,db)
+    else: save_plan_yaml(p,y)
+
+class IntentJournal:
+    # Append-only JSON-lines log of orders about to be sent, fsynced before the request goes out. A tick that dies
+    # between the send and save_plan leaves its intents here for recover_intents; save_plan empties it.
+    def __init__(self,path): self.path=path; self.lock=threading.Lock()
+    def write(self,bodies):
+        rows="".join(json.dumps({"ts":int(time.time()),"clientId":b["clientId"],"side":b["side"],"price":b["price"],"qty":b["qty"]},separators=(',',':'))+"\n" for b in bodies)
+        with self.lock, open(self.path,"a") as f:
+            f.write(rows); f.flush(); os.fsync(f.fileno())
+    def read(self):
+        try:
+            with open(self.path) as f: lines=f.read().splitlines()
+        except FileNotFoundError: return []
+        out=[]
+        for ln in lines:
+            try: out.append(json.loads(ln))
+            except ValueError: pass   # a torn last line from a crash mid-write
+        return out
+    def pending(self):
+        try: return os.path.getsize(self.path)>0
+        except OSError: return False
+    def clear(self):
+        with self.lock:
+            if self.pending(): open(self.path,"w").close()
+
+_JOURNALS={}
+def journal(symbol):
+    path=os.path.join(config.APPDIR,f"intents-{symbol}.jsonl")
+    if path not in _JOURNALS: _JOURNALS[path]=IntentJournal(path)
+    return _JOURNALS[path]
+
+def plan_id(plan):
+    # short stable id stored in the plan; prefixes every clientId the plan sends
+    m=plan["meta"]=plan.get("meta") or {}
+    if not m.get("id"): m["id"]=uuid.uuid4().hex[:8]
+    return m["id"]
+
+def client_id(plan,i,attempt=None):
+    # <plan id>-<level idx>-<attempt>: the same level never reuses an id, and an id always leads back to its level
+    return f"{plan_id(plan)}-{i}-{attempt or int(plan['levels'][i].get('attempt') or 0)+1}"
+
+def cid_parts(cid):
+    # (plan id, level idx, attempt), or None for ids this bot did not derive (probes, older random ids)
+    try: pid,i,a=str(cid).rsplit("-",2); return pid,int(i),int(a)
+    except (ValueError,TypeError): return None
+
+def next_client_id(cid):
+    pid,i,a=cid_parts(cid); return f"{pid}-{i}-{a+1}"
+
+def note_attempts(plan,bodies):
+    # advance each level's attempt past every id that went out, accepted or not
+    for b in bodies:
+        p=cid_parts(b["clientId"])
+        if p and p[0]==plan_id(plan) and p[1]<len(plan["levels"]):
+            L=plan["levels"][p[1]]; L["attempt"]=max(int(L.get("attempt") or 0),p[2]); plan_index(plan).touch(p[1])
+
+def export_snapshot(plan):
+    with open(config.SNAPCSV,"w",newline="") as f:
+        w=csv.writer(f)
+        w.writerow(["ts_iso","symbol","idx","side","price","status","orderId"])
+        ts=datetime.datetime.now(datetime.UTC).isoformat()
+        for i,L in enumerate(plan["levels"]):
+            w.writerow([ts,plan["symbol"],i,L["side"],L["price"],L["status"],L["orderId"] if L["orderId"] else ""])
+    return config.SNAPCSV
+
+def plan_mtime(symbol=None,cfg=None):
+    cfg=cfg if cfg is not None else config.load_cfg() or {}
+    y,db=plan_paths(symbol,cfg); path=db if plan_store(cfg)=="sqlite" else y
+    try: return os.stat(path).st_mtime_ns
+    except OSError: return None
@@ -0,0 +1,77 @@
+# Tick log: one CSV row per symbol per tick (rotated to gzip archives) and the Prometheus textfile.
+import os, csv, json, time, datetime
+from . import config
+from .metrics import METRICS
+from .plan import plan_stats
+
+TICK_HEADER=["ts_iso","symbol","cap","hb","lb","band_pct","levels_total","levels_pending","levels_placed","levels_filled","placed_buys","placed_sells","qty_per_level","available_usdt","leverage","sum_buy_prices",
+             "tick_ms","requests","retries","errors","api_ms","sign_ms","plan_io_ms","phase_ms","endpoint_p50_ms","endpoint_p95_ms"]
+
+TICKLOG_MAX_BYTES=16*2**20
+
+def archive_key(path):
+    # ticks-<UTC time>Z[.n].csv.gz -> (time, n): a second rotation within the same second gets .1, .2, ..., which
+    # plain name order would put before the unsuffixed (older) archive
+    ts,_,n=os.path.basename(path)[6:-7].partition(".")
+    return ts,int(n or 0)
+
+def rotate_ticklog(cfg, path=None):
+    # Archive the tick log to ticks-<UTC time>.csv.gz once it passes tickLog.maxBytes, or when tickLog.rotate is
+    # daily/weekly/monthly and its first row is from an earlier period. tickLog.keep caps the archives (0 keeps all).
+    path=path or config.TICKCSV
+    try: size=os.stat(path).st_size
+    except OSError: return None
+    opt=cfg.get("tickLog") or {}
+    with open(path,newline="") as f:
+        r=csv.reader(f); hdr=next(r,None); first=next(r,None)
+    if hdr and hdr!=TICK_HEADER:
+        os.replace(path,path[:-4]+f"-legacy-{int(time.time())}.csv"); return None   # older column set
+    if not first: return None
+    now=datetime.datetime.now(datetime.UTC); then=first[0]; every=opt.get("rotate","size")
+    due=size>=int(opt.get("maxBytes",TICKLOG_MAX_BYTES))
+    if every=="daily": due|=then[:10]!=now.isoformat()[:10]
+    elif every=="monthly": due|=then[:7]!=now.isoformat()[:7]
+    elif every=="weekly": due|=datetime.date.fromisoformat(then[:10]).isocalendar()[:2]!=now.date().isocalendar()[:2]
+    if not due: return None
+    import gzip, shutil, glob
+    base=os.path.join(os.path.dirname(path),"ticks-"+now.strftime("%Y%m%dT%H%M%SZ")); out=base+".csv.gz"; n=1
+    while os.path.exists(out): out=f"{base}.{n}.csv.gz"; n+=1
+    with open(path,"rb") as src, gzip.open(out+".tmp","wb") as dst: shutil.copyfileobj(src,dst,1<<20)
+    os.replace(out+".tmp",out); os.remove(path)
+    keep=int(opt.get("keep",0))
+    if keep:
+        for old in sorted(glob.glob(os.path.join(os.path.dirname(path),"ticks-2*.csv.gz")),key=archive_key)[:-keep]: os.remove(old)
+    return out
+
+def log_tick(cfg, plan, meta, prom=True):
+    st=plan_stats(plan); m=METRICS.summary()
+    ts=datetime.datetime.now(datetime.UTC).isoformat()
+    rotate_ticklog(cfg)
+    new=not os.path.exists(config.TICKCSV)
+    js=lambda d: json.dumps(d,separators=(',',':'))
+    with open(config.TICKCSV,"a",newline="") as f:
+        w=csv.writer(f)
+        if new: w.writerow(TICK_HEADER)
+        w.writerow([ts,cfg["symbol"],meta.get("cap"),meta.get("hb"),meta.get("lb"),cfg.get("bandPct",3.0),st["total"],st["pending"],st["placed"],st["filled"],meta.get("placed_buys"),meta.get("placed_sells"),meta.get("qty"),meta.get("available"),cfg.get("leverage"),meta.get("sum_buy_prices"),
+                    m["tick_ms"],m["requests"],m["retries"],js(m["errors"]),m["api_ms"],m["sign_ms"],m["plan_io_ms"],js(m["phase_ms"]),js(m["p50_ms"]),js(m["p95_ms"])])
+    if prom: write_prom(cfg,m)
+
+def write_prom(cfg,m):
+    # node_exporter textfile collector format; written via rename so a scrape never sees a partial file
+    path=cfg.get("promTextfile") or config.PROMFILE; sym=cfg["symbol"]; L=[]
+    def g(name,help_,rows):
+        L.append(f"# HELP {name} {help_}"); L.append(f"# TYPE {name} gauge")
+        for labels,v in rows: L.append(name+"{"+",".join('%s="%s"'%kv for kv in [("symbol",sym)]+labels)+"} "+str(round(v,6) if isinstance(v,float) else v))
+    g("bitunix_tick_duration_seconds","Wall time of the last tick.",[([],m["tick_ms"]/1000)])
+    g("bitunix_tick_requests","API requests made by the last tick.",[([],m["requests"])])
+    g("bitunix_tick_retries","Transport retries during the last tick.",[([],m["retries"])])
+    g("bitunix_tick_plan_io_seconds","Plan load+save time in the last tick.",[([],m["plan_io_ms"]/1000)])
+    g("bitunix_tick_sign_seconds","Request signing time in the last tick.",[([],m["sign_ms"]/1000)])
+    g("bitunix_tick_phase_seconds","Time per tick phase.",[([("phase",k)],v/1000) for k,v in m["phase_ms"].items()])
+    g("bitunix_api_latency_seconds","Per-endpoint latency quantiles in the last tick.",[([("endpoint",k),("quantile","0.5")],v/1000) for k,v in m["p50_ms"].items()]+[([("endpoint",k),("quantile","0.95")],v/1000) for k,v in m["p95_ms"].items()])
+    g("bitunix_api_requests","Per-endpoint request count in the last tick.",[([("endpoint",k)],v) for k,v in m["count"].items()])
+    g("bitunix_api_errors","Non-zero response codes in the last tick.",[([("code",k)],v) for k,v in m["errors"].items()])
+    g("bitunix_tick_last_timestamp_seconds","Unix time the last tick was logged.",[([],int(time.time()))])
+    tmp=path+".tmp"
+    with open(tmp,"w") as f: f.write("\n".join(L)+"\n")
+    os.replace(tmp,path)
@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+# Thin client for `bitunix_grid_bot.py --daemon`: stdlib only so it starts in a few milliseconds.
+import os, sys, json, socket
+
+SOCK=os.path.join(os.path.expanduser("~"),".bitunix_grid_bot","daemon.sock")
+
+def send(cmd,sock=SOCK,timeout=300):
+    with socket.socket(socket.AF_UNIX,socket.SOCK_STREAM) as s:
+        s.settimeout(timeout); s.connect(sock)
+        s.sendall((json.dumps({"cmd":cmd})+"\n").encode())
+        buf=b""
+        while not buf.endswith(b"\n"):
+            chunk=s.recv(65536)
+            if not chunk: break
+            buf+=chunk
+    return json.loads(buf)
+
+def main():
+    if len(sys.argv)!=2 or sys.argv[1] not in ("tick","status","cancel","stop"):
+        print("usage: bitunix_ctl.py tick|status|cancel|stop",file=sys.stderr); sys.exit(2)
+    try: out=send(sys.argv[1])
+    except (FileNotFoundError,ConnectionRefusedError):
+        print("daemon not running (start it with: python bitunix_grid_bot.py --daemon)",file=sys.stderr); sys.exit(1)
+    print(json.dumps(out,indent=2))
+    sys.exit(1 if "error" in out else 0)
+
+if __name__=="__main__": main()
@@ -1,80 +1,19 @@
 #!/usr/bin/env python3
-import os, sys, json, time, hashlib, uuid, pathlib, stat, getpass, requests, yaml, re, argparse, csv, datetime
-from rich.console import Console
-from rich.table import Table
+# Interactive menu, CLI flags and the --daemon loop over bitunix_core, which holds the client, plan model and
+# tick engine. Tables and tick printouts come from bitunix_console, shared with bitunix_grid_plan.
+import os, sys, json, time, stat, argparse, threading
+from bitunix_core import config
+from bitunix_core.config import ensure_dirs, save_secrets, load_secrets, load_cfg, save_cfg
+from bitunix_core.cache import CACHE, cache_ttl
+from bitunix_core.metrics import METRICS
+from bitunix_core.client import get_client
+from bitunix_core.plan import make_plan, plan_stats, parse_cursor, load_plan, save_plan, load_plan_yaml, save_plan_yaml, plan_store, export_snapshot, plan_mtime
+from bitunix_core.engine import TickSnapshot, tick_execute, run_cycle, apply_regrid, cancel_all_symbol, symbol_cfgs, batch_size
+from bitunix_core.ticklog import log_tick
+from bitunix_core.history import plan_history
+from bitunix_console import console, print_meta, status_table
 
-HOME=os.path.expanduser("~")
-APPDIR=os.path.join(HOME,".bitunix_grid_bot")
-SECRETS=os.path.join(APPDIR,"secrets.json")
-CONFIG=os.path.join(APPDIR,"config.yaml")
-PLAN=os.path.join(APPDIR,"plan.yaml")
-LOGDIR=os.path.join(APPDIR,"logs")
-TICKCSV=os.path.join(LOGDIR,"ticks.csv")
-SNAPCSV=os.path.join(LOGDIR,"plan_snapshot.csv")
-BASE="https://fapi.bitunix.com"
-console=Console()
 _last_api_ok=False
-UTILIZATION=0.95
-
-def now_ms(): return str(int(time.time()*1000))
-def sha256_hex(s):
-    import hashlib
-    return hashlib.sha256(s.encode()).hexdigest()
-
-class BitunixClient:
-    def __init__(self,k,s):
-        self.k=k; self.s=s
-        self.h={"language":"en-US","Content-Type":"application/json"}
-    def _sign(self,method,path,q=None,b=None):
-        nonce=uuid.uuid4().hex; ts=now_ms(); qp=""
-        if q: qp="".join([f"{k}{v}" for k,v in sorted(q.items())])
-        body=json.dumps(b,separators=(',',':')) if b else ""
-        digest=sha256_hex(nonce+ts+self.k+qp+body)
-        sign=sha256_hex(digest+self.s)
-        h={**self.h,"api-key":self.k,"nonce":nonce,"timestamp":ts,"sign":sign}
-        url=BASE+path
-        if q: url+="?"+ "&".join([f"{k}={v}" for k,v in sorted(q.items())])
-        return url,h,body
-    def get(self,p,q=None):
-        u,h,_=self._sign("GET",p,q,None)
-        return requests.get(u,headers=h,timeout=30).json()
-    def post(self,p,b=None):
-        u,h,d=self._sign("POST",p,None,b)
-        return requests.post(u,headers=h,data=d,timeout=30).json()
-    def change_leverage(self,symbol,lev,coin="USDT"):
-        return self.post("/api/v1/futures/account/change_leverage",{"symbol":symbol,"leverage":int(lev),"marginCoin":coin})
-    def change_margin_mode(self,symbol,mode="ISOLATION",coin="USDT"):
-        return self.post("/api/v1/futures/account/change_margin_mode",{"symbol":symbol,"marginMode":mode,"marginCoin":coin})
-    def change_position_mode(self,mode="ONE_WAY"):
-        return self.post("/api/v1/futures/account/change_position_mode",{"positionMode":mode})
-    def place(self,b): return self.post("/api/v1/futures/trade/place_order",b)
-    def pending_orders(self,symbol): return self.post("/api/v1/futures/trade/get_pending_orders",{"symbol":symbol})
-    def cancel_orders(self,orderIdList): return self.post("/api/v1/futures/trade/cancel_orders",{"orderIdList":orderIdList})
-    def positions(self,symbol=None):
-        q={}
-        if symbol: q["symbol"]=symbol
-        return self.get("/api/v1/futures/position/get_pending_positions",q)
-
-def ensure_dirs():
-    pathlib.Path(APPDIR).mkdir(parents=True,exist_ok=True)
-    pathlib.Path(LOGDIR).mkdir(parents=True,exist_ok=True)
-    if not os.path.exists(SECRETS):
-        with open(SECRETS,"w") as f: json.dump({"api_key":"","api_secret":""},f)
-        os.chmod(SECRETS,stat.S_IRUSR|stat.S_IWUSR)
-    if not os.path.exists(CONFIG):
-        with open(CONFIG,"w") as f: yaml.safe_dump({"symbol":"BTCUSDT","leverage":3,"marginMode":"ISOLATION","positionMode":"ONE_WAY","tif":"GTC","levels":16,"bandPct":3.0,"highestSell":200000,"maxPlacePerTick":12},f)
-    if not os.path.exists(PLAN):
-        with open(PLAN,"w") as f: yaml.safe_dump({"symbol":"BTCUSDT","levels":[],"meta":{"created":int(time.time())}},f)
-    if not os.path.exists(TICKCSV):
-        with open(TICKCSV,"w",newline="") as f:
-            w=csv.writer(f)
-            w.writerow(["ts_iso","symbol","cap","hb","lb","band_pct","levels_total","levels_pending","levels_placed","levels_filled","placed_buys","placed_sells","qty_per_level","available_usdt","leverage","sum_buy_prices"])
-
-def load_secrets(): return json.load(open(SECRETS))
-def load_cfg(): return yaml.safe_load(open(CONFIG))
-def save_cfg(cfg): yaml.safe_dump(cfg,open(CONFIG,"w"))
-def load_plan(): return yaml.safe_load(open(PLAN))
-def save_plan(p): yaml.safe_dump(p,open(PLAN,"w"))
 
 def input_float(p):
     while True:
@@ -98,152 +37,26 @@ def input_float_default(p, default):
     try: return float(v)
     except: return float(default)
 
-def _first_row_like(d):
-    if isinstance(d,list) and d: return d[0]
-    if isinstance(d,dict): return d
-    return {}
-
-def get_account(c):
-    r=c.get("/api/v1/futures/account",{"marginCoin":"USDT"})
-    row=_first_row_like(r.get("data"))
-    avail=0.0
-    for k in ("available","availableBalance","availableMargin","cashBalance","availableCash"):
-        if k in row:
-            try: avail=float(row[k]); break
-            except: pass
-    return avail,r
-
-def get_rules(c,symbol):
-    r=c.get("/api/v1/futures/market/trading_pairs",{"symbols":symbol})
-    row=_first_row_like(r.get("data"))
-    basePrecision=int(row.get("basePrecision",4)) if row else 4
-    minTradeVolume=float(row.get("minTradeVolume","0.0001")) if row else 0.0001
-    return basePrecision,minTradeVolume,r
-
-def round_qty(qty, prec):
-    fmt="{:0."+str(prec)+"f}"
-    return float(fmt.format(qty))
-
-def detect_buy_cap(c,symbol,probe_price,min_vol):
-    r=c.place({"symbol":symbol,"side":"BUY","tradeSide":"OPEN","orderType":"LIMIT","qty":str(min_vol),"price":str(probe_price),"effect":"POST_ONLY","reduceOnly":False,"clientId":f"probe-{uuid.uuid4().hex[:6]}"})
-    if r.get("code")==0 and r.get("data") and r["data"].get("orderId"):
-        oid=r["data"]["orderId"]; c.cancel_orders([{"orderId":oid,"symbol":symbol}]); return None,r
-    m=re.search(r"Max Buy Order Price\s+([0-9]+(?:\.[0-9]+)?)", str(r.get("msg","")))
-    if r.get("code")==30014 and m: return float(m.group(1)),r
-    return None,r
-
-def cancel_all_symbol(c,symbol):
-    pend=c.pending_orders(symbol); ids=[]
-    if pend.get("code")==0 and pend.get("data"):
-        for o in pend["data"]:
-            ids.append({"orderId":o["orderId"],"symbol":symbol})
-    if ids: return c.cancel_orders(ids)
-    return {"code":0,"msg":"No pending"}
-
-def make_plan(symbol, lowest_buy, highest_buy, highest_sell, total_levels=50, buy_fraction=0.67):
-    buy_levels=max(2,int(total_levels*buy_fraction)); sell_levels=max(2,total_levels-buy_levels)
-    buys=[round(lowest_buy+i*((highest_buy-lowest_buy)/(buy_levels-1)),2) for i in range(buy_levels)]
-    sells=[round(highest_buy+i*((highest_sell-highest_buy)/(sell_levels-1)),2) for i in range(sell_levels)]
-    levels=[{"side":"BUY","price":p,"status":"PENDING","orderId":None} for p in buys]+[{"side":"SELL","price":p,"status":"PENDING","orderId":None} for p in sells]
-    return {"symbol":symbol,"levels":levels,"meta":{"created":int(time.time()),"lowest_buy":lowest_buy,"highest_buy":highest_buy,"highest_sell":highest_sell,"total":total_levels,"buy_levels":buy_levels,"sell_levels":sell_levels}}
-
-def plan_stats(plan):
-    t=len(plan["levels"]); filled=sum(1 for L in plan["levels"] if L["status"]=="FILLED"); placed=sum(1 for L in plan["levels"] if L["status"]=="PLACED"); pending=t-filled-placed
-    return {"total":t,"placed":placed,"filled":filled,"pending":pending}
-
-def status_table(plan):
-    st=plan_stats(plan)
-    tbl=Table(title=f"Plan {plan['symbol']} | total {st['total']} placed {st['placed']} filled {st['filled']} pending {st['pending']}")
-    tbl.add_column("Idx"); tbl.add_column("Side"); tbl.add_column("Price"); tbl.add_column("Status"); tbl.add_column("OrderId")
-    for i,L in enumerate(plan["levels"]):
-        tbl.add_row(str(i),L["side"],str(L["price"]),L["status"],str(L["orderId"]))
-    console.print(tbl)
-
-def compute_qty(available, lev, buy_prices, base_prec, min_vol):
-    if not buy_prices: return min_vol
-    sum_prices=sum(buy_prices)
-    qty=(available*lev*UTILIZATION)/sum_prices
-    qty=round_qty(qty, base_prec)
-    if qty<min_vol: qty=min_vol
-    return qty
-
-def reconcile_fills_with_pending(c,symbol,plan):
-    pend=c.pending_orders(symbol)
-    pend_ids=set()
-    if pend.get("code")==0 and pend.get("data"):
-        for o in pend["data"]:
-            pend_ids.add(o["orderId"])
-    for L in plan["levels"]:
-        if L["orderId"] and L["status"] in ("PLACED","PENDING"):
-            if L["orderId"] not in pend_ids:
-                L["status"]="FILLED"
-    return plan
-
-def tick_execute(c, cfg, plan, band_pct=None, max_place=None):
-    base_prec, min_vol, _=get_rules(c, cfg["symbol"])
-    avail,_=get_account(c)
-    cap,_=detect_buy_cap(c, cfg["symbol"], 10**9, min_vol)
-    if cap is None:
-        console.print("[red]Cap unavailable[/]")
-        return plan, {"cap":None,"hb":None,"lb":None,"qty":None,"placed_buys":0,"placed_sells":0}
-    hb=round(cap*0.999,2); lb=round(hb*(1-(band_pct or cfg.get("bandPct",3.0))/100.0),2)
-    buys_window=[L for L in plan["levels"] if L["side"]=="BUY" and L["status"]=="PENDING" and lb<=L["price"]<=hb]
-    buys_window=sorted(buys_window, key=lambda x: x["price"])
-    if max_place is None: max_place=cfg.get("maxPlacePerTick",12)
-    buys_window=buys_window[:max_place]
-    qty=compute_qty(avail, cfg["leverage"], [L["price"] for L in buys_window], base_prec, min_vol)
-    placed_buys=0; placed_sells=0
-    for L in buys_window:
-        b={"symbol":cfg["symbol"],"side":"BUY","tradeSide":"OPEN","orderType":"LIMIT","qty":str(qty),"price":str(L["price"]),"effect":cfg["tif"],"reduceOnly":False,"clientId":f"pbuy-{uuid.uuid4().hex[:8]}"}
-        r=c.place(b)
-        if r.get("code")==20003:
-            qty=max(min_vol, round_qty(qty*0.85, base_prec))
-            r=c.place({**b,"qty":str(qty),"clientId":f"pbuy-{uuid.uuid4().hex[:8]}"})
-        if r.get("code")==0 and r.get("data"):
-            L["status"]="PLACED"; L["orderId"]=r["data"]["orderId"]; placed_buys+=1
-    plan=reconcile_fills_with_pending(c,cfg["symbol"],plan)
-    pos=c.positions(cfg["symbol"])
-    has_long=False; pos_id=None
-    if pos.get("code")==0 and pos.get("data"):
-        for p in pos["data"]:
-            if p.get("side")=="LONG" and float(p.get("openQty","0"))>0:
-                has_long=True; pos_id=p.get("positionId"); break
-    if has_long:
-        pending_sells=[L for L in plan["levels"] if L["side"]=="SELL" and L["status"]=="PENDING"]
-        take=sorted(pending_sells, key=lambda x: x["price"])[:max_place]
-        for L in take:
-            b={"symbol":cfg["symbol"],"side":"SELL","tradeSide":"CLOSE","orderType":"LIMIT","qty":str(qty),"price":str(L["price"]),"effect":cfg["tif"],"reduceOnly":True,"clientId":f"psell-{uuid.uuid4().hex[:8]}","positionId":pos_id}
-            r=c.place(b)
-            if r.get("code")==0 and r.get("data"):
-                L["status"]="PLACED"; L["orderId"]=r["data"]["orderId"]; placed_sells+=1
-    return plan, {"cap":cap,"hb":hb,"lb":lb,"qty":qty,"placed_buys":placed_buys,"placed_sells":placed_sells,"available":avail,"sum_buy_prices":sum([L["price"] for L in buys_window])}
-
-def log_tick(cfg, plan, meta):
-    st=plan_stats(plan)
-    ts=datetime.datetime.now(datetime.UTC).isoformat()
-    with open(TICKCSV,"a",newline="") as f:
-        w=csv.writer(f)
-        w.writerow([ts,cfg["symbol"],meta.get("cap"),meta.get("hb"),meta.get("lb"),cfg.get("bandPct",3.0),st["total"],st["pending"],st["placed"],st["filled"],meta.get("placed_buys"),meta.get("placed_sells"),meta.get("qty"),meta.get("available"),cfg.get("leverage"),meta.get("sum_buy_prices")])
-
-def export_snapshot(plan):
-    with open(SNAPCSV,"w",newline="") as f:
-        w=csv.writer(f)
-        w.writerow(["ts_iso","symbol","idx","side","price","status","orderId"])
-        ts=datetime.datetime.now(datetime.UTC).isoformat()
-        for i,L in enumerate(plan["levels"]):
-            w.writerow([ts,plan["symbol"],i,L["side"],L["price"],L["status"],L["orderId"] if L["orderId"] else ""])
-    return SNAPCSV
+def input_float_opt(p):
+    v=input(p).strip()
+    try: return float(v) if v else None
+    except: return None
 
-def test_api():
+def test_api(quick=False):
+    # quick: trust a fresh cached leverage/margin-mode check (the tick's own account call still proves the keys)
     global _last_api_ok
     sec=load_secrets()
     if not sec["api_key"] or not sec["api_secret"]:
         console.print("[red]No API keys saved yet[/]"); _last_api_ok=False; return False
-    c=BitunixClient(sec["api_key"],sec["api_secret"])
-    r1=c.get("/api/v1/futures/account/get_leverage_margin_mode",{"symbol":"BTCUSDT","marginCoin":"USDT"})
+    cfg=load_cfg(); sym=cfg.get("symbol","BTCUSDT")
+    if quick and CACHE.get(f"levmargin:{sym}") is not None:
+        _last_api_ok=True; return True
+    c=get_client(cfg)
+    r1=c.get("/api/v1/futures/account/get_leverage_margin_mode",{"symbol":sym,"marginCoin":"USDT"})
     r2=c.get("/api/v1/futures/account",{"marginCoin":"USDT"})
     ok=(r1.get("code")==0 and r2.get("code")==0)
     _last_api_ok=ok
+    if ok: CACHE.put(f"levmargin:{sym}",r1.get("data"),cache_ttl(cfg,"levmargin"))
     if ok: console.print("[green]API connection successful![/]")
     else: console.print("[red]API connection failed[/]")
     console.print({"leverage_margin_mode":r1,"single_account":r2})
@@ -269,16 +82,16 @@ def menu():
         console.print("6) Show PLAN status")
         console.print("7) Show positions and pending orders")
         console.print("8) Cancel all pending orders on symbol")
-        console.print("9) Export PLAN snapshot CSV")
+        console.print("9) Export PLAN snapshot + history CSV")
         console.print("0) Exit")
         choice=input("> ").strip()
         if choice=="1":
             test_api()
         elif choice=="2":
+            import getpass
             k=input("API Key: ").strip()
             s=getpass.getpass("API Secret: ").strip()
-            with open(SECRETS,"w") as f: json.dump({"api_key":k,"api_secret":s},f)
-            os.chmod(SECRETS,stat.S_IRUSR|stat.S_IWUSR)
+            save_secrets(k,s)
             console.print("[green]Saved[/]"); test_api()
         elif choice=="3":
             if not need_api_ok(): continue
@@ -294,8 +107,9 @@ def menu():
             mpt=input_int(f"Max new orders per tick [{cfg.get('maxPlacePerTick',12)}]: ", default=cfg.get("maxPlacePerTick",12), minv=1)
             cfg.update({"symbol":sym,"leverage":int(lev),"marginMode":mm,"positionMode":pm,"tif":tif,"levels":levels,"bandPct":bandPct,"highestSell":hs,"maxPlacePerTick":mpt})
             save_cfg(cfg)
-            sec=load_secrets(); c=BitunixClient(sec["api_key"],sec["api_secret"])
+            c=get_client(cfg)
             console.print(c.change_leverage(sym,int(lev))); console.print(c.change_margin_mode(sym,mm)); console.print(c.change_position_mode(pm))
+            CACHE.drop("levmargin:","rules:")
         elif choice=="4":
             if not need_api_ok(): continue
             cfg=load_cfg()
@@ -305,46 +119,157 @@ def menu():
             lv=input_int("Plan total levels [50]: ", default=50, minv=4)
             bf=input_float_default("Plan buy fraction (0.67=67%) [0.67]: ", 0.67)
             plan=make_plan(cfg["symbol"], float(lb), float(hb), float(hs), int(lv), float(bf))
+            old=load_plan()
+            if old.get("levels") and input("Re-grid live orders onto the new plan instead of starting fresh? [y/N]: ").strip().lower()=="y":
+                c=get_client(cfg); _,d=apply_regrid(c,cfg,plan,old,dry_run=True)
+                console.print({"regrid":{k:d[k] for k in ("keep","cancel","place")},"ops":d["ops"]})
+                if input("Apply? [y/N]: ").strip().lower()!="y": continue
+                plan,d=apply_regrid(c,cfg,plan,old)
+                console.print({"regrid":{k:d.get(k) for k in ("keep","cancel","place","placed")}})
             save_plan(plan)
             console.print({"plan":"saved","stats":plan_stats(plan)})
         elif choice=="5":
             if not need_api_ok(): continue
-            cfg=load_cfg(); sec=load_secrets(); c=BitunixClient(sec["api_key"],sec["api_secret"])
-            plan=load_plan()
+            cfg=load_cfg(); c=get_client(cfg)
+            METRICS.reset(); plan=load_plan(cfg=cfg)
             band=input_float_default(f"Band % for this tick [{cfg.get('bandPct',3.0)}]: ", cfg.get("bandPct",3.0))
             mplace=input_int(f"Max new orders this tick [{cfg.get('maxPlacePerTick',12)}]: ", default=cfg.get("maxPlacePerTick",12), minv=1)
-            plan,meta=tick_execute(c,cfg,plan,band_pct=band,max_place=mplace); save_plan(plan); log_tick(cfg,plan,meta); console.print({"tick":meta}); status_table(plan)
+            plan,meta=tick_execute(c,cfg,plan,band_pct=band,max_place=mplace); save_plan(plan,cfg=cfg); log_tick(cfg,plan,meta); print_meta({"tick":meta},{cfg["symbol"]:meta}); status_table(plan,limit=20)
         elif choice=="6":
-            plan=load_plan(); status_table(plan)
+            plan=load_plan()
+            side=input("Side BUY/SELL [all]: ").strip() or None; status=input("Status PENDING/PLACED/FILLED [all]: ").strip() or None
+            lo=input_float_opt("Min price [none]: "); hi=input_float_opt("Max price [none]: ")
+            v=status_table(plan,side=side,status=status,lo=lo,hi=hi)
+            while v["next"] and input("Enter for next page, q to stop: ").strip().lower()!="q":
+                v=status_table(plan,side=side,status=status,lo=lo,hi=hi,after=parse_cursor(v["next"]))
         elif choice=="7":
             if not need_api_ok(): continue
-            cfg=load_cfg(); sec=load_secrets(); c=BitunixClient(sec["api_key"],sec["api_secret"])
-            console.print({"positions":c.positions(cfg["symbol"])})
-            console.print({"pending_orders":c.pending_orders(cfg["symbol"])})
+            cfg=load_cfg(); snap=TickSnapshot(get_client(cfg),cfg,want=("positions","pending")).fetch()
+            console.print({"positions":snap.positions}); console.print({"pending_orders":snap.pending})
         elif choice=="8":
             if not need_api_ok(): continue
-            cfg=load_cfg(); sec=load_secrets(); c=BitunixClient(sec["api_key"],sec["api_secret"])
-            console.print(cancel_all_symbol(c,cfg["symbol"]))
+            cfg=load_cfg(); c=get_client(cfg)
+            console.print(cancel_all_symbol(c,cfg["symbol"],batch_size(cfg)))
         elif choice=="9":
-            plan=load_plan(); path=export_snapshot(plan); console.print({"snapshot_csv":path})
+            plan=load_plan(); path=export_snapshot(plan)
+            since=input("History since (ISO date/time, blank for all): ").strip() or None
+            hp=os.path.join(config.LOGDIR,"plan_history.csv"); n=plan_history().export_csv(hp,plan.get("symbol"),since)
+            console.print({"snapshot_csv":path,"history_csv":hp,"transitions":n})
         elif choice=="0":
             sys.exit(0)
         else:
             console.print("[red]Invalid choice[/]")
 
+class Daemon:
+    # Keeps cfg, client (pool + cache) and plan warm; ticks on a timer and on request from the control socket.
+    def __init__(self):
+        self.lock=threading.Lock(); self.stop=threading.Event(); self.last=None; self.next_at=0.0
+        self.cfg=load_cfg(); self.client=get_client(self.cfg); self.plans={}; self.mtime={}; self._fresh()
+    def _fresh(self):
+        # pick up plans and config written by the menu or another CLI since our last save
+        self.cfg=load_cfg(); self.client=get_client(self.cfg)
+        syms=[x["symbol"] for x in symbol_cfgs(self.cfg)]
+        for s in syms:
+            if s not in self.plans or plan_mtime(s,self.cfg)!=self.mtime.get(s): self.plans[s]=load_plan(s,self.cfg); self.mtime[s]=plan_mtime(s,self.cfg)
+        for s in set(self.plans)-set(syms): del self.plans[s]
+    def tick(self):
+        with self.lock:
+            METRICS.reset(); self._fresh()
+            _,metas=run_cycle(self.client,self.cfg,self.plans)
+            for s in self.plans: self.mtime[s]=plan_mtime(s,self.cfg)
+            self.last={"ts":int(time.time()),"meta":metas,"metrics":METRICS.summary()}
+            return {"tick_done":True,"meta":metas,"stats":{s:plan_stats(p) for s,p in self.plans.items()}}
+    def handle(self,req):
+        cmd=req.get("cmd")
+        if cmd=="tick": return self.tick()
+        if cmd=="status":
+            with self.lock:
+                self._fresh()
+                return {"symbols":list(self.plans),"stats":{s:plan_stats(p) for s,p in self.plans.items()},"last_tick":self.last,"next_tick_in":round(max(0.0,self.next_at-time.time()),1)}
+        if cmd=="cancel":
+            with self.lock: return {s:cancel_all_symbol(self.client,s,batch_size(self.cfg)) for s in self.plans}
+        if cmd=="stop": self.stop.set(); return {"stopping":True}
+        return {"error":f"unknown command {cmd!r}","commands":["tick","status","cancel","stop"]}
+    def schedule(self):
+        while not self.stop.is_set():
+            self.next_at=time.time()+float(self.cfg.get("tickInterval",3600))
+            if self.stop.wait(max(0.0,self.next_at-time.time())): break
+            try: r=self.tick(); print_meta(r,r["meta"])
+            except Exception as e: console.print(f"[red]tick failed: {e!r}[/]")
+
+def run_daemon(sock=None):
+    import socketserver, signal
+    sock=sock or config.SOCK
+    if not test_api(): sys.exit(1)
+    d=Daemon()
+    class H(socketserver.StreamRequestHandler):
+        def handle(self):
+            try: out=d.handle(json.loads(self.rfile.readline() or b"{}"))
+            except Exception as e: out={"error":repr(e)}
+            self.wfile.write((json.dumps(out,default=str)+"\n").encode())
+    if os.path.exists(sock): os.unlink(sock)
+    srv=socketserver.ThreadingUnixStreamServer(sock,H); srv.daemon_threads=True
+    os.chmod(sock,stat.S_IRUSR|stat.S_IWUSR)
+    if threading.current_thread() is threading.main_thread(): signal.signal(signal.SIGTERM,lambda *a: d.stop.set())
+    threading.Thread(target=srv.serve_forever,daemon=True).start()
+    console.print({"daemon":"running","socket":sock,"interval":d.cfg.get("tickInterval",3600)})
+    try: d.schedule()
+    except KeyboardInterrupt: pass
+    finally:
+        srv.shutdown(); srv.server_close()
+        if os.path.exists(sock): os.unlink(sock)
+
 def main():
     ensure_dirs()
     ap=argparse.ArgumentParser()
     ap.add_argument("--plan-tick",action="store_true")
+    ap.add_argument("--no-cache",action="store_true",help="ignore cached rules, band ratio and API check")
+    ap.add_argument("--plan-import",metavar="YAML",help="replace the active plan store's plan with a plan.yaml-format file")
+    ap.add_argument("--plan-export",metavar="YAML",help="write the active plan to a plan.yaml-format file")
+    ap.add_argument("--symbol",help="with --plan-export/--regrid: which symbol's plan (default: the primary symbol)")
+    ap.add_argument("--regrid",metavar="YAML",help="move live orders onto this plan with minimal cancels/places")
+    ap.add_argument("--dry-run",action="store_true",help="with --regrid: print the diff only")
+    ap.add_argument("--status",action="store_true",help="print one page of the plan (around the last cap unless filtered)")
+    ap.add_argument("--side",choices=["BUY","SELL"],help="with --status")
+    ap.add_argument("--level-status",choices=["PENDING","PLACED","FILLED"],help="with --status")
+    ap.add_argument("--min-price",type=float); ap.add_argument("--max-price",type=float)
+    ap.add_argument("--limit",type=int,default=40); ap.add_argument("--after",help="with --status: the 'next' cursor of the previous page")
+    ap.add_argument("--json",action="store_true",help="with --status: print JSON")
+    ap.add_argument("--history-at",metavar="TICK|TIME",help="print the plan as saved at a history tick id or ISO time (takes the --status filters)")
+    ap.add_argument("--history-csv",metavar="CSV",help="export level transitions to CSV (--symbol, --since, --until)")
+    ap.add_argument("--since",help="with --history-csv: ISO date/time, UTC"); ap.add_argument("--until")
+    ap.add_argument("--daemon",action="store_true",help="stay resident, tick every tickInterval seconds and serve bitunix_ctl.py on daemon.sock")
     args=ap.parse_args()
+    if args.no_cache: CACHE.enabled=False
+    if args.plan_import:
+        p=load_plan_yaml(args.plan_import); save_plan(p,p.get("symbol")); console.print({"plan_import":args.plan_import,"symbol":p.get("symbol"),"store":plan_store(),"stats":plan_stats(p)}); sys.exit(0)
+    if args.plan_export:
+        p=load_plan(args.symbol); save_plan_yaml(p,args.plan_export); console.print({"plan_export":args.plan_export,"stats":plan_stats(p)}); sys.exit(0)
     if args.plan_tick:
-        if not test_api(): sys.exit(1)
-        cfg=load_cfg(); sec=load_secrets(); c=BitunixClient(sec["api_key"],sec["api_secret"])
-        plan=load_plan()
-        plan,meta=tick_execute(c,cfg,plan,band_pct=cfg.get("bandPct",3.0),max_place=cfg.get("maxPlacePerTick",12))
-        save_plan(plan); log_tick(cfg,plan,meta)
-        st=plan_stats(plan); console.print({"tick_done":True,"meta":meta,"stats":st})
+        if not test_api(quick=True): sys.exit(1)
+        cfg=load_cfg(); c=get_client(cfg)
+        METRICS.reset()
+        plans,metas=run_cycle(c,cfg)
+        print_meta({"tick_done":True,"meta":metas,"stats":{s:plan_stats(p) for s,p in plans.items()}},metas)
         sys.exit(0)
+    if args.status:
+        status_table(load_plan(args.symbol),as_json=args.json,side=args.side,status=args.level_status,lo=args.min_price,hi=args.max_price,
+                     limit=args.limit,after=parse_cursor(args.after) if args.after else None); sys.exit(0)
+    if args.history_csv:
+        n=plan_history().export_csv(args.history_csv,args.symbol,args.since,args.until); console.print({"history_csv":args.history_csv,"transitions":n}); sys.exit(0)
+    if args.history_at:
+        t=args.history_at; p=plan_history().at(tick=int(t)) if t.isdigit() else plan_history().at(symbol=args.symbol or load_cfg()["symbol"],at=t)
+        if p is None: console.print("[red]No plan history at that point[/]"); sys.exit(1)
+        status_table(p,as_json=args.json,side=args.side,status=args.level_status,lo=args.min_price,hi=args.max_price,
+                     limit=args.limit,after=parse_cursor(args.after) if args.after else None); sys.exit(0)
+    if args.regrid:
+        if not test_api(quick=True): sys.exit(1)
+        cfg=load_cfg(); new=load_plan_yaml(args.regrid); sym=args.symbol or new.get("symbol") or cfg["symbol"]; old=load_plan(sym)
+        new,d=apply_regrid(get_client(cfg),{**cfg,"symbol":sym},new,old,dry_run=args.dry_run)
+        if not args.dry_run: save_plan(new,sym)
+        console.print({"regrid":{k:d.get(k) for k in ("keep","cancel","place","placed")},"dry_run":args.dry_run,"ops":d["ops"]}); sys.exit(0)
+    if args.daemon:
+        run_daemon(); sys.exit(0)
     menu()
 
 if __name__=="__main__":
@@ -1,213 +1,177 @@
 #!/usr/bin/env python3
-import os, sys, json, time, uuid, pathlib, stat, getpass, requests, yaml, re, argparse
-from rich.console import Console
-from rich.table import Table
-
-HOME=os.path.expanduser("~")
-APPDIR=os.path.join(HOME,".bitunix_grid_bot")
-SECRETS=os.path.join(APPDIR,"secrets.json")
-CONFIG=os.path.join(APPDIR,"config.yaml")
-PLAN=os.path.join(APPDIR,"plan.yaml")
-BASE="https://fapi.bitunix.com"
-console=Console()
-UTILIZATION=0.95
-
-def now_ms(): return str(int(time.time()*1000))
-def sha256_hex(s): 
-    import hashlib; 
-    return hashlib.sha256(s.encode()).hexdigest()
-
-class BitunixClient:
-    def __init__(self,k,s):
-        self.k=k; self.s=s; self.h={"language":"en-US","Content-Type":"application/json","language":"en-US"}
-    def _sign(self,method,path,q=None,b=None):
-        nonce=uuid.uuid4().hex; ts=now_ms(); qp=""
-        if q: qp="".join([f"{k}{v}" for k,v in sorted(q.items())])
-        body=json.dumps(b,separators=(',',':')) if b else ""
-        digest=sha256_hex(nonce+ts+self.k+qp+body); sign=sha256_hex(digest+self.s)
-        h={**self.h,"api-key":self.k,"nonce":nonce,"timestamp":ts,"sign":sign}
-        url=BASE+path
-        if q: url+="?"+ "&".join([f"{k}={v}" for k,v in sorted(q.items())])
-        return url,h,body
-    def get(self,p,q=None): u,h,_=self._sign("GET",p,q,None); return requests.get(u,headers=h,timeout=30).json()
-    def post(self,p,b=None): u,h,d=self._sign("POST",p,None,b); return requests.post(u,headers=h,data=d,timeout=30).json()
-    def change_leverage(self,symbol,lev,coin="USDT"): return self.post("/api/v1/futures/account/change_leverage",{"symbol":symbol,"leverage":int(lev),"marginCoin":coin})
-    def change_margin_mode(self,symbol,mode="ISOLATION",coin="USDT"): return self.post("/api/v1/futures/account/change_margin_mode",{"symbol":symbol,"marginMode":mode,"marginCoin":coin})
-    def change_position_mode(self,mode="ONE_WAY"): return self.post("/api/v1/futures/account/change_position_mode",{"positionMode":mode})
-    def place(self,b): return self.post("/api/v1/futures/trade/place_order",b)
-    def pending_orders(self,symbol): return self.post("/api/v1/futures/trade/get_pending_orders",{"symbol":symbol})
-    def cancel_orders(self,orderIdList): return self.post("/api/v1/futures/trade/cancel_orders",{"orderIdList":orderIdList})
-    def positions(self,symbol=None):
-        q={}; 
-        if symbol: q["symbol"]=symbol
-        return self.get("/api/v1/futures/position/get_pending_positions",q)
-
-def ensure_dirs():
-    pathlib.Path(APPDIR).mkdir(parents=True,exist_ok=True)
-    if not os.path.exists(SECRETS):
-        with open(SECRETS,"w") as f: json.dump({"api_key":"","api_secret":""},f); os.chmod(SECRETS,stat.S_IRUSR|stat.S_IWUSR)
-    if not os.path.exists(CONFIG):
-        with open(CONFIG,"w") as f: yaml.safe_dump({"symbol":"BTCUSDT","leverage":3,"marginMode":"ISOLATION","positionMode":"ONE_WAY","tif":"GTC","levels":16,"bandPct":3.0,"highestSell":160000,"maxPlacePerTick":12},f)
-    if not os.path.exists(PLAN):
-        with open(PLAN,"w") as f: yaml.safe_dump({"symbol":"BTCUSDT","levels":[],"meta":{"created":int(time.time())}},f)
-
-def load_secrets(): return json.load(open(SECRETS))
-def load_cfg(): return yaml.safe_load(open(CONFIG))
-def save_cfg(cfg): yaml.safe_dump(cfg,open(CONFIG,"w"))
-def load_plan(): return yaml.safe_load(open(PLAN))
-def save_plan(p): yaml.safe_dump(p,open(PLAN,"w"))
-
-def first_row_like(d):
-    if isinstance(d,list) and d: return d[0]
-    if isinstance(d,dict): return d
-    return {}
-
-def get_account(c):
-    r=c.get("/api/v1/futures/account",{"marginCoin":"USDT"})
-    row=first_row_like(r.get("data"))
-    avail=0.0
-    for k in ("available","availableBalance","availableMargin","cashBalance","availableCash"):
-        if k in row:
-            try: avail=float(row[k]); break
-            except: pass
-    return avail,r
-
-def get_rules(c,symbol):
-    r=c.get("/api/v1/futures/market/trading_pairs",{"symbols":symbol})
-    row=first_row_like(r.get("data"))
-    basePrecision=int(row.get("basePrecision",4)) if row else 4
-    minTradeVolume=float(row.get("minTradeVolume","0.0001")) if row else 0.0001
-    return basePrecision,minTradeVolume,r
-
-def detect_buy_cap(c,symbol,probe_price,min_vol):
-    r=c.place({"symbol":symbol,"side":"BUY","tradeSide":"OPEN","orderType":"LIMIT","qty":str(min_vol),"price":str(probe_price),"effect":"POST_ONLY","reduceOnly":False,"clientId":f"probe-{uuid.uuid4().hex[:6]}"})
-    if r.get("code")==0 and r.get("data") and r["data"].get("orderId"):
-        oid=r["data"]["orderId"]; c.cancel_orders([{"orderId":oid,"symbol":symbol}]); return None,r
-    m=re.search(r"Max Buy Order Price\s+([0-9]+(?:\.[0-9]+)?)", str(r.get("msg","")))
-    if r.get("code")==30014 and m: return float(m.group(1)),r
-    return None,r
-
-def round_qty(qty, prec):
-    fmt="{:0."+str(prec)+"f}"; return float(fmt.format(qty))
-
-def make_plan(symbol, lowest_buy, highest_buy, highest_sell, total_levels=50, buy_fraction=0.67):
-    buy_levels=max(2,int(total_levels*buy_fraction)); sell_levels=max(2,total_levels-buy_levels)
-    buys=[round(lowest_buy+i*((highest_buy-lowest_buy)/(buy_levels-1)),2) for i in range(buy_levels)]
-    sells=[round(highest_buy+i*((highest_sell-highest_buy)/(sell_levels-1)),2) for i in range(sell_levels)]
-    levels=[{"side":"BUY","price":p,"status":"PENDING","orderId":None} for p in buys]+[{"side":"SELL","price":p,"status":"PENDING","orderId":None} for p in sells]
-    return {"symbol":symbol,"levels":levels,"meta":{"created":int(time.time()),"lowest_buy":lowest_buy,"highest_buy":highest_buy,"highest_sell":highest_sell,"total":total_levels,"buy_levels":buy_levels,"sell_levels":sell_levels}}
-
-def plan_stats(plan):
-    t=len(plan["levels"]); filled=sum(1 for L in plan["levels"] if L["status"]=="FILLED"); placed=sum(1 for L in plan["levels"] if L["status"]=="PLACED")
-    pending=t-filled-placed
-    return {"total":t,"placed":placed,"filled":filled,"pending":pending}
-
-def status_table(plan):
-    st=plan_stats(plan)
-    tbl=Table(title=f"Plan {plan['symbol']} | total {st['total']} placed {st['placed']} filled {st['filled']} pending {st['pending']}")
-    tbl.add_column("Idx"); tbl.add_column("Side"); tbl.add_column("Price"); tbl.add_column("Status"); tbl.add_column("OrderId")
-    for i,L in enumerate(plan["levels"]):
-        tbl.add_row(str(i),L["side"],str(L["price"]),L["status"],str(L["orderId"]))
-    console.print(tbl)
+# Subcommand front end over bitunix_core: make-plan, status, tick, loop (polled or websocket-driven), cancel, and the
+# offline backtest, sweep and report tools.
+import json, time, uuid, argparse
+from bitunix_core import config, client
+from bitunix_core.config import ensure_dirs, load_cfg
+from bitunix_core.client import get_client, sha256_hex
+from bitunix_core.metrics import METRICS
+from bitunix_core.plan import make_plan, plan_stats, plan_index, load_plan, save_plan, journal, client_id, note_attempts
+from bitunix_core.engine import tick_execute, cancel_all_symbol, place_all, batch_size, margin_rates
+from bitunix_core.ticklog import log_tick
+from bitunix_core.history import plan_history
+from bitunix_console import console, status_table
+
+WS_PRIVATE="wss://fapi.bitunix.com/private/"
 
-def compute_qty(available, lev, buy_prices, base_prec, min_vol):
-    if not buy_prices: return min_vol
-    sum_prices=sum(buy_prices)
-    qty=(available*lev*UTILIZATION)/sum_prices
-    qty=round_qty(qty, base_prec)
-    if qty<min_vol: qty=min_vol
-    return qty
-
-def reconcile_fills_with_pending(c,symbol,plan):
-    pend=c.pending_orders(symbol)
-    pend_ids=set()
-    if pend.get("code")==0 and pend.get("data"):
-        for o in pend["data"]:
-            pend_ids.add(o["orderId"])
-    for L in plan["levels"]:
-        if L["orderId"] and L["status"] in ("PLACED","PENDING"):
-            if L["orderId"] not in pend_ids:
-                if L["side"]=="BUY": L["status"]="FILLED"
-                elif L["side"]=="SELL": L["status"]="FILLED"
-    return plan
-
-def tick_execute(c, cfg, plan, band_pct=None, max_place=None):
-    base_prec, min_vol, _=get_rules(c, cfg["symbol"])
-    avail,_=get_account(c)
-    cap,_=detect_buy_cap(c, cfg["symbol"], 10**9, min_vol)
-    if cap is None: 
-        console.print("[red]Cap unavailable[/]"); 
-        return plan
-    hb=round(cap*0.999,2); lb=round(hb*(1-(band_pct or cfg.get("bandPct",3.0))/100.0),2)
-    buys_window=[L for L in plan["levels"] if L["side"]=="BUY" and L["status"]=="PENDING" and lb<=L["price"]<=hb]
-    sells_all=[L for L in plan["levels"] if L["side"]=="SELL" and L["status"]=="PENDING"]
-    buys_window=sorted(buys_window, key=lambda x: x["price"])
-    if max_place is None: max_place=cfg.get("maxPlacePerTick",12)
-    buys_window=buys_window[:max_place]
-    qty=compute_qty(avail, cfg["leverage"], [L["price"] for L in buys_window], base_prec, min_vol)
-    for L in buys_window:
-        b={"symbol":cfg["symbol"],"side":"BUY","tradeSide":"OPEN","orderType":"LIMIT","qty":str(qty),"price":str(L["price"]),"effect":cfg["tif"],"reduceOnly":False,"clientId":f"pbuy-{uuid.uuid4().hex[:8]}"}
-        r=c.place(b)
-        if r.get("code")==20003:
-            qty=max(min_vol, round_qty(qty*0.85, base_prec))
-            r=c.place({**b,"qty":str(qty),"clientId":f"pbuy-{uuid.uuid4().hex[:8]}"})
-        if r.get("code")==0 and r.get("data"):
-            L["status"]="PLACED"; L["orderId"]=r["data"]["orderId"]
-    plan=reconcile_fills_with_pending(c,cfg["symbol"],plan)
-    pos=c.positions(cfg["symbol"])
-    has_long=False; pos_id=None
-    if pos.get("code")==0 and pos.get("data"):
-        for p in pos["data"]:
-            if p.get("side")=="LONG" and float(p.get("openQty","0"))>0:
-                has_long=True; pos_id=p.get("positionId"); break
-    if has_long:
-        pending_sells=[L for L in plan["levels"] if L["side"]=="SELL" and L["status"]=="PENDING"]
-        take=sorted(pending_sells, key=lambda x: x["price"])[:max_place]
-        for L in take:
-            b={"symbol":cfg["symbol"],"side":"SELL","tradeSide":"CLOSE","orderType":"LIMIT","qty":str(qty),"price":str(L["price"]),"effect":cfg["tif"],"reduceOnly":True,"clientId":f"psell-{uuid.uuid4().hex[:8]}","positionId":pos_id}
-            r=c.place(b)
-            if r.get("code")==0 and r.get("data"):
-                L["status"]="PLACED"; L["orderId"]=r["data"]["orderId"]
-    return plan
-
-def cancel_all_symbol(c,symbol):
-    pend=c.pending_orders(symbol); ids=[]
-    if pend.get("code")==0 and pend.get("data"):
-        for o in pend["data"]:
-            ids.append({"orderId":o["orderId"],"symbol":symbol})
-    if ids: return c.cancel_orders(ids)
-    return {"code":0,"msg":"No pending"}
+def tick_once(c,cfg,p,band_pct=None,max_place=None):
+    METRICS.reset()
+    p,meta=tick_execute(c,cfg,p,band_pct=band_pct,max_place=max_place); save_plan(p,cfg=cfg); log_tick(cfg,p,meta)
+    if meta.get("error"): console.print(f"[red]{meta['error']}[/]")
+    return p,meta
 
 def cmd_make_plan(args):
-    ensure_dirs()
-    sec=load_secrets(); cfg=load_cfg()
-    c=BitunixClient(sec["api_key"],sec["api_secret"])
+    ensure_dirs(); cfg=load_cfg()
     p=make_plan(cfg["symbol"], args.lowest_buy, args.highest_buy, args.highest_sell, args.levels, args.buy_fraction)
-    save_plan(p); console.print({"plan":"created","stats":plan_stats(p)}); status_table(p)
+    save_plan(p); console.print({"plan":"created","stats":plan_stats(p)}); status_table(p,limit=20)
 
 def cmd_status(args):
-    ensure_dirs(); p=load_plan(); status_table(p)
+    ensure_dirs(); p=load_plan()
+    status_table(p,as_json=args.json,side=args.side,status=args.status,lo=args.min_price,hi=args.max_price,limit=args.limit,after=args.after)
 
 def cmd_tick(args):
-    ensure_dirs(); sec=load_secrets(); cfg=load_cfg(); p=load_plan()
-    c=BitunixClient(sec["api_key"],sec["api_secret"])
-    p=tick_execute(c,cfg,p,band_pct=args.band_pct,max_place=args.max_place); save_plan(p); status_table(p)
+    ensure_dirs(); cfg=load_cfg(); c=get_client(cfg)
+    p,_=tick_once(c,cfg,load_plan(cfg=cfg),args.band_pct,args.max_place); status_table(p,limit=20)
 
 def cmd_loop(args):
-    ensure_dirs(); sec=load_secrets(); cfg=load_cfg()
-    c=BitunixClient(sec["api_key"],sec["api_secret"])
+    ensure_dirs(); cfg=load_cfg(); c=get_client(cfg)
+    if args.base_url: client.BASE=args.base_url.rstrip("/")
+    if args.ws:
+        import asyncio
+        return asyncio.run(ws_loop(c,cfg,c.k,c.s,args))
     while True:
-        p=load_plan()
-        p=tick_execute(c,cfg,p,band_pct=args.band_pct,max_place=args.max_place)
-        save_plan(p)
-        st=plan_stats(p)
-        console.print({"loop_tick":"done","stats":st})
+        p,_=tick_once(c,cfg,load_plan(cfg=cfg),args.band_pct,args.max_place)
+        console.print({"loop_tick":"done","stats":plan_stats(p)})
         time.sleep(args.interval)
 
+def ws_login_msg(k,s):
+    nonce=uuid.uuid4().hex; ts=int(time.time())
+    return {"op":"login","args":[{"apiKey":k,"timestamp":ts,"nonce":nonce,"sign":sha256_hex(sha256_hex(nonce+str(ts)+k)+s)}]}
+
+def on_order_event(c,cfg,p,d,state):
+    # a FILLED push marks the level (with fill qty/price, as reconcile_fills would) and, for a BUY, queues the lowest
+    # pending SELL reduce-only right away for the filled qty
+    if d.get("symbol") not in (None,cfg["symbol"]) or d.get("orderStatus")!="FILLED": return False
+    ix=plan_index(p)
+    i=next((i for side in ("BUY","SELL") for i in ix.ids(side,"PLACED") if p["levels"][i]["orderId"]==d.get("orderId")),None)
+    if i is None: return False
+    L=p["levels"][i]; q=float(d.get("tradeQty") or d.get("qty") or 0) or float(L.get("qty") or 0)
+    ix.set_status(i,"FILLED",fill_qty=q,fill_price=float(d.get("avgPrice") or 0) or L["price"],filled_at=int(d.get("mtime") or time.time()*1000))
+    L.pop("fill_value",None)
+    if L["side"]=="BUY" and q>0:
+        for j in ix.lowest("SELL","PENDING",1):
+            b={"symbol":cfg["symbol"],"side":"SELL","tradeSide":"CLOSE","orderType":"LIMIT","qty":str(q),"price":str(p["levels"][j]["price"]),"effect":cfg["tif"],"reduceOnly":True,"clientId":client_id(p,j)}
+            if state.get("pos_id"): b["positionId"]=state["pos_id"]
+            r=place_all(c,[b],journal=journal(cfg["symbol"]))[0]; note_attempts(p,[b])
+            if r.get("code")==0 and r.get("data"): ix.set_status(j,"PLACED",orderId=r["data"]["orderId"],qty=float(b["qty"]),clientId=b["clientId"])
+    return True
+
+async def ws_loop(c,cfg,k,s,args):
+    import asyncio, websockets
+    p=load_plan(cfg=cfg); state={"pos_id":None}; next_poll=0.0; lock=asyncio.Lock()
+    async def poll():
+        nonlocal p
+        async with lock:
+            p,_=await asyncio.to_thread(tick_once,c,cfg,p,args.band_pct,args.max_place)
+        console.print({"loop_tick":"poll","stats":plan_stats(p)})
+    async for ws in websockets.connect(args.ws_url,ping_interval=None):
+        try:
+            await ws.send(json.dumps(ws_login_msg(k,s)))
+            await ws.send(json.dumps({"op":"subscribe","args":[{"ch":"order"},{"ch":"position"}]}))
+            while True:
+                now=time.monotonic()
+                if now>=next_poll:
+                    await poll(); next_poll=time.monotonic()+args.interval
+                try: raw=await asyncio.wait_for(ws.recv(),timeout=min(args.heartbeat,max(0.1,next_poll-time.monotonic())))
+                except asyncio.TimeoutError:
+                    await ws.send(json.dumps({"op":"ping","ping":int(time.time())})); continue
+                msg=json.loads(raw); d=msg.get("data")
+                if msg.get("ch")=="position" and isinstance(d,dict) and d.get("side")=="LONG":
+                    state["pos_id"]=d.get("positionId") if d.get("event")!="CLOSE" else None
+                elif msg.get("ch")=="order" and isinstance(d,dict):
+                    async with lock:
+                        if await asyncio.to_thread(on_order_event,c,cfg,p,d,state):
+                            save_plan(p,cfg=cfg); console.print({"fill":d.get("orderId"),"side":d.get("side"),"stats":plan_stats(p)})
+        except websockets.ConnectionClosed:
+            console.print("[yellow]WebSocket closed, reconnecting[/]"); continue
+
+
+def cmd_backtest(args):
+    import bitunix_backtest as bt
+    cfg=load_cfg()
+    if args.lowest_buy is None: p=load_plan()
+    else: p=make_plan(cfg["symbol"], args.lowest_buy, args.highest_buy, args.highest_sell, args.levels, args.buy_fraction)
+    t=time.time(); candles=bt.load_candles(args.data); fee,buf=margin_rates(cfg)
+    res=bt.backtest(p,candles,capital=args.capital,leverage=args.leverage or cfg.get("leverage",3),band_pct=args.band_pct or cfg.get("bandPct",3.0),
+                    max_place=args.max_place or cfg.get("maxPlacePerTick",12),tick_every=args.tick_every,cap_ratio=args.cap_ratio,fee_rate=fee,margin_buffer=buf)
+    res["seconds"]=round(time.time()-t,3)
+    if args.json: print(json.dumps(res))
+    else: console.print({"backtest":res,"plan":plan_stats(p)})
+
+def cmd_sweep(args):
+    import bitunix_backtest as bt
+    cfg=load_cfg()
+    grid={"lowest_buy":bt.parse_range(args.lowest_buy),"highest_buy":bt.parse_range(args.highest_buy),"highest_sell":bt.parse_range(args.highest_sell),
+          "total_levels":bt.parse_range(args.levels,int),"buy_fraction":bt.parse_range(args.buy_fraction),"band_pct":bt.parse_range(args.band_pct or cfg.get("bandPct",3.0))}
+    t=time.time(); fee,buf=margin_rates(cfg)
+    rows=bt.sweep(args.data,grid,workers=args.workers,rank_by=args.rank_by,descending=args.rank_by!="max_drawdown_pct",
+                  capital=args.capital,leverage=args.leverage or cfg.get("leverage",3),max_place=args.max_place or cfg.get("maxPlacePerTick",12),tick_every=args.tick_every,cap_ratio=args.cap_ratio,
+                  fee_rate=fee,margin_buffer=buf)
+    if args.csv:
+        import csv
+        with open(args.csv,"w",newline="") as f:
+            w=csv.DictWriter(f,fieldnames=list(rows[0].keys()) if rows else ["lowest_buy"]); w.writeheader(); w.writerows(rows)
+    cols=["lowest_buy","highest_buy","highest_sell","total_levels","buy_fraction","band_pct","buys_filled","sells_filled","realized_pnl","final_equity","avg_utilization","max_drawdown_pct"]
+    from rich.table import Table
+    tbl=Table(title=f"Sweep {len(rows)} configs in {time.time()-t:.1f}s | ranked by {args.rank_by}")
+    tbl.add_column("#")
+    for h in cols: tbl.add_column(h)
+    for i,r in enumerate(rows[:args.top]): tbl.add_row(str(i+1),*[str(r[h]) for h in cols])
+    console.print(tbl)
+
+def cmd_report(args):
+    import bitunix_report as rp
+    cols=["window","symbol","ticks","placed_buys","placed_sells","fills","fill_rate","idle_pct","avail_avg","cap_first","cap_last","cap_drift_pct","cap_move_avg","band_avg","tick_ms_avg"]
+    rows=rp.report(args.logdir or config.LOGDIR,args.window,args.since,args.until,args.symbol)
+    if args.json:
+        for r in rows: print(json.dumps(r))
+        return
+    if args.csv:
+        import csv
+        with open(args.csv,"w",newline="") as f:
+            w=None
+            for r in rows:
+                if w is None: w=csv.DictWriter(f,fieldnames=list(r.keys())); w.writeheader()
+                w.writerow(r)
+        console.print({"report_csv":args.csv}); return
+    from rich.table import Table
+    tbl=Table(title=f"Tick log report per {args.window}")
+    for h in cols: tbl.add_column(h)
+    for r in rows: tbl.add_row(*[str(r[h]) if r[h] is not None else "" for h in cols])
+    console.print(tbl)
+
+def cmd_history(args):
+    h=plan_history(); sym=args.symbol or load_cfg()["symbol"]
+    if args.csv:
+        n=h.export_csv(args.csv,sym,args.since,args.until); console.print({"history_csv":args.csv,"transitions":n}); return
+    if args.at:
+        p=h.at(tick=int(args.at)) if args.at.isdigit() else h.at(symbol=sym,at=args.at)
+        if p is None: console.print("[red]No plan history at that point[/]"); return
+        if not args.json: console.print({"tick":p["meta"]["history_tick"],"plan_id":p["meta"]["id"],"ts":p["meta"]["history_ts"]})
+        status_table(p,as_json=args.json,limit=args.limit); return
+    rows=h.ticks(sym,args.since,args.until)[-args.limit:]
+    if args.json:
+        for r in rows: print(json.dumps(dict(zip(("tick","plan_id","symbol","ts","transitions"),r))))
+        return
+    from rich.table import Table
+    tbl=Table(title=f"Plan history {sym} (last {len(rows)} recorded ticks)")
+    for col in ("tick","plan_id","time (UTC)","transitions"): tbl.add_column(col)
+    for t,pid,_,ts,n in rows: tbl.add_row(str(t),pid,time.strftime("%Y-%m-%d %H:%M:%S",time.gmtime(ts)),str(n))
+    console.print(tbl)
+
 def cmd_cancel(args):
-    ensure_dirs(); sec=load_secrets(); cfg=load_cfg()
-    c=BitunixClient(sec["api_key"],sec["api_secret"])
-    console.print(cancel_all_symbol(c,cfg["symbol"]))
+    ensure_dirs(); cfg=load_cfg()
+    console.print(cancel_all_symbol(get_client(cfg),cfg["symbol"],batch_size(cfg)))
 
 def main():
     ensure_dirs()
@@ -220,7 +184,14 @@ def main():
     ap_make.add_argument("--levels",type=int,default=50)
     ap_make.add_argument("--buy-fraction",type=float,default=0.67)
     ap_make.set_defaults(func=cmd_make_plan)
-    ap_status=sub.add_parser("status"); ap_status.set_defaults(func=cmd_status)
+    ap_status=sub.add_parser("status",help="one page of levels, centred on the last cap unless filtered")
+    ap_status.add_argument("--side",choices=["BUY","SELL"])
+    ap_status.add_argument("--status",choices=["PENDING","PLACED","FILLED"])
+    ap_status.add_argument("--min-price",type=float); ap_status.add_argument("--max-price",type=float)
+    ap_status.add_argument("--limit",type=int,default=40)
+    ap_status.add_argument("--after",help="the 'next' cursor printed under the previous page")
+    ap_status.add_argument("--json",action="store_true")
+    ap_status.set_defaults(func=cmd_status)
     ap_tick=sub.add_parser("tick")
     ap_tick.add_argument("--band-pct",type=float,default=None)
     ap_tick.add_argument("--max-place",type=int,default=None)
@@ -229,8 +200,63 @@ def main():
     ap_loop.add_argument("--band-pct",type=float,default=None)
     ap_loop.add_argument("--max-place",type=int,default=None)
     ap_loop.add_argument("--interval",type=int,default=3600)
+    ap_loop.add_argument("--ws",action="store_true",help="react to order/position pushes; --interval becomes the safety-net poll")
+    ap_loop.add_argument("--ws-url",default=WS_PRIVATE)
+    ap_loop.add_argument("--heartbeat",type=float,default=20.0)
+    ap_loop.add_argument("--base-url",default=None,help="REST base, e.g. a local bitunix_sim.py")
     ap_loop.set_defaults(func=cmd_loop)
     ap_cancel=sub.add_parser("cancel"); ap_cancel.set_defaults(func=cmd_cancel)
+    ap_bt=sub.add_parser("backtest",help="replay plan.yaml (or a make-plan spec) over OHLCV candles")
+    ap_bt.add_argument("--data",required=True,help="CSV or Parquet with open/high/low/close columns")
+    ap_bt.add_argument("--lowest-buy",type=float,default=None)
+    ap_bt.add_argument("--highest-buy",type=float,default=None)
+    ap_bt.add_argument("--highest-sell",type=float,default=None)
+    ap_bt.add_argument("--levels",type=int,default=50)
+    ap_bt.add_argument("--buy-fraction",type=float,default=0.67)
+    ap_bt.add_argument("--capital",type=float,default=1000.0)
+    ap_bt.add_argument("--leverage",type=int,default=None)
+    ap_bt.add_argument("--band-pct",type=float,default=None)
+    ap_bt.add_argument("--max-place",type=int,default=None)
+    ap_bt.add_argument("--tick-every",type=int,default=60,help="candles per tick (60 = hourly ticks on 1m data)")
+    ap_bt.add_argument("--cap-ratio",type=float,default=1.0,help="max buy price / mark")
+    ap_bt.add_argument("--json",action="store_true")
+    ap_bt.set_defaults(func=cmd_backtest)
+    ap_sw=sub.add_parser("sweep",help="score make-plan parameter ranges by backtest across a process pool")
+    ap_sw.add_argument("--data",required=True)
+    ap_sw.add_argument("--lowest-buy",required=True,help="a:b:step or a,b,c")
+    ap_sw.add_argument("--highest-buy",required=True)
+    ap_sw.add_argument("--highest-sell",required=True)
+    ap_sw.add_argument("--levels",default="50")
+    ap_sw.add_argument("--buy-fraction",default="0.67")
+    ap_sw.add_argument("--band-pct",default=None)
+    ap_sw.add_argument("--capital",type=float,default=1000.0)
+    ap_sw.add_argument("--leverage",type=int,default=None)
+    ap_sw.add_argument("--max-place",type=int,default=None)
+    ap_sw.add_argument("--tick-every",type=int,default=60)
+    ap_sw.add_argument("--cap-ratio",type=float,default=1.0)
+    ap_sw.add_argument("--workers",type=int,default=None)
+    ap_sw.add_argument("--rank-by",default="final_equity",choices=["final_equity","realized_pnl","max_drawdown_pct","avg_utilization","sells_filled"])
+    ap_sw.add_argument("--top",type=int,default=20)
+    ap_sw.add_argument("--csv",default=None,help="write every scored config to this file")
+    ap_sw.set_defaults(func=cmd_sweep)
+    ap_rp=sub.add_parser("report",help="windowed aggregates streamed from ticks.csv and its rotated archives")
+    ap_rp.add_argument("--window",default="day",choices=["hour","day","week","month"])
+    ap_rp.add_argument("--since",default=None,help="ISO date/time, UTC (e.g. 2026-01-01)")
+    ap_rp.add_argument("--until",default=None)
+    ap_rp.add_argument("--symbol",default=None)
+    ap_rp.add_argument("--logdir",default=None,help="default: the logs directory under the app dir")
+    ap_rp.add_argument("--json",action="store_true",help="one JSON object per line, printed as each window closes")
+    ap_rp.add_argument("--csv",default=None)
+    ap_rp.set_defaults(func=cmd_report)
+    ap_hi=sub.add_parser("history",help="recorded level transitions: list ticks, rebuild the plan at one, or export to CSV")
+    ap_hi.add_argument("--at",default=None,help="tick id or ISO time: show the plan as saved then")
+    ap_hi.add_argument("--since",default=None,help="ISO date/time, UTC")
+    ap_hi.add_argument("--until",default=None)
+    ap_hi.add_argument("--symbol",default=None)
+    ap_hi.add_argument("--limit",type=int,default=40)
+    ap_hi.add_argument("--csv",default=None,help="write one row per transition in --since/--until to this file")
+    ap_hi.add_argument("--json",action="store_true")
+    ap_hi.set_defaults(func=cmd_history)
     args=ap.parse_args(); args.func(args)
 
 if __name__=="__main__": main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# Streaming report over the tick log: ticks-legacy-*.csv, the ticks-*.csv.gz archives and ticks.csv are read in
+# time order one row at a time, and windowed aggregates are emitted as each window closes, so memory stays flat
+# however many years of ticks there are. Columns are looked up by name, so older column sets read fine too.
+import os, csv, gzip, glob, datetime, operator
+from bitunix_core.ticklog import archive_key
+
+WINDOWS=("hour","day","week","month")
+
+def log_files(logdir, since=None):
+    # oldest first; an archive is named for the time it was rotated, so one rotated before `since` is skipped unread
+    legacy=sorted(glob.glob(os.path.join(logdir,"ticks-legacy-*.csv")),key=lambda p: int(p.rsplit("-",1)[-1][:-4]))
+    arch=sorted(glob.glob(os.path.join(logdir,"ticks-2*.csv.gz")),key=archive_key)
+    if since:
+        cut=since.replace("-","").replace(":","")[:15]
+        arch=[p for p in arch if os.path.basename(p)[6:21]>=cut]
+        legacy=[p for p in legacy if datetime.datetime.fromtimestamp(int(p.rsplit("-",1)[-1][:-4]),datetime.UTC).isoformat()>=since]
+    cur=os.path.join(logdir,"ticks.csv")
+    return legacy+arch+([cur] if os.path.exists(cur) else [])
+
+COLS=("ts_iso","symbol","placed_buys","placed_sells","levels_filled","levels_placed","available_usdt","cap","hb","lb","tick_ms")
+
+def iter_rows(paths):
+    # one tuple per data line in COLS order (None for a column the file does not have); numbers stay strings
+    for p in paths:
+        with (gzip.open(p,"rt",newline="") if p.endswith(".gz") else open(p,newline="")) as f:
+            r=csv.reader(f); hdr=next(r,None)
+            if not hdr: continue
+            at=[hdr.index(c) if c in hdr else None for c in COLS]
+            if at[0] is None: at[0]=0
+            n=len(hdr); have=[i for i in at if i is not None]
+            if len(have)==len(at):
+                get=operator.itemgetter(*at)
+                for row in r:
+                    if len(row)>=n: yield get(row)
+            else:
+                for row in r:
+                    if len(row)>=n: yield tuple(None if i is None else row[i] for i in at)
+
+def _f(v):
+    if not v or v=="None": return None
+    try: return float(v)
+    except ValueError: return None
+
+def window_key(ts, window, _weeks={}):
+    if window=="hour": return ts[:13]
+    if window=="day": return ts[:10]
+    if window=="month": return ts[:7]
+    d=ts[:10]
+    if d not in _weeks:
+        if len(_weeks)>64: _weeks.clear()
+        y,w,_=datetime.date.fromisoformat(d).isocalendar(); _weeks[d]=f"{y}-W{w:02d}"
+    return _weeks[d]
+
+class _Agg:
+    __slots__=("ticks","buys","sells","fills","idle","avail","avail_n","cap_first","cap_last","cap_min","cap_max","cap_moves","cap_move_n","band","band_n","tick_ms","tick_ms_n")
+    def __init__(self):
+        self.ticks=self.buys=self.sells=self.fills=self.idle=self.avail_n=self.cap_move_n=self.band_n=self.tick_ms_n=0
+        self.avail=self.cap_moves=self.band=self.tick_ms=0.0
+        self.cap_first=self.cap_last=self.cap_min=self.cap_max=None
+    def row(self,window,symbol):
+        r=lambda v,n=2: None if v is None else round(v,n)
+        placed=self.buys+self.sells
+        return {"window":window,"symbol":symbol,"ticks":self.ticks,"placed_buys":self.buys,"placed_sells":self.sells,"fills":self.fills,
+                "fill_rate":r(self.fills/placed,3) if placed else None,"idle_pct":r(100.0*self.idle/self.ticks,1) if self.ticks else None,
+                "avail_avg":r(self.avail/self.avail_n) if self.avail_n else None,"cap_first":self.cap_first,"cap_last":self.cap_last,
+                "cap_min":self.cap_min,"cap_max":self.cap_max,
+                "cap_drift_pct":r(100.0*(self.cap_last-self.cap_first)/self.cap_first,3) if self.cap_first else None,
+                "cap_move_avg":r(self.cap_moves/self.cap_move_n) if self.cap_move_n else None,
+                "band_avg":r(self.band/self.band_n) if self.band_n else None,"tick_ms_avg":r(self.tick_ms/self.tick_ms_n,1) if self.tick_ms_n else None}
+
+def report(logdir, window="day", since=None, until=None, symbol=None):
+    # Yields one dict per (window, symbol) as soon as the window closes. Fills are the rise in levels_filled between
+    # a symbol's consecutive ticks (a drop means the plan was replaced and is not counted); a tick with no level
+    # PLACED counts as idle; cap movement is the mean absolute cap change between consecutive ticks.
+    if window not in WINDOWS: raise ValueError(f"window must be one of {WINDOWS}")
+    cur=None; aggs={}; last_filled={}; last_cap={}
+    for ts,sym,pb,ps,filled,placed,av,cap,hb,lb,tm in iter_rows(log_files(logdir,since)):
+        if (since and ts<since) or (until and ts>=until): continue
+        sym=sym or ""
+        if symbol and sym!=symbol: continue
+        k=window_key(ts,window)
+        if k!=cur:
+            for s in sorted(aggs): yield aggs[s].row(cur,s)
+            cur=k; aggs={}
+        a=aggs.get(sym)
+        if a is None: a=aggs[sym]=_Agg()
+        a.ticks+=1
+        if pb and pb!="0": a.buys+=int(_f(pb) or 0)
+        if ps and ps!="0": a.sells+=int(_f(ps) or 0)
+        filled=_f(filled)
+        if filled is not None:
+            prev=last_filled.get(sym)
+            if prev is not None and filled>prev: a.fills+=int(filled-prev)
+            last_filled[sym]=filled
+        if not placed or placed=="0": a.idle+=1
+        av=_f(av)
+        if av is not None: a.avail+=av; a.avail_n+=1
+        cap=_f(cap)
+        if cap:
+            if a.cap_first is None: a.cap_first=cap
+            a.cap_last=cap
+            if a.cap_min is None or cap<a.cap_min: a.cap_min=cap
+            if a.cap_max is None or cap>a.cap_max: a.cap_max=cap
+            prev=last_cap.get(sym)
+            if prev: a.cap_moves+=abs(cap-prev); a.cap_move_n+=1
+            last_cap[sym]=cap
+        hb,lb=_f(hb),_f(lb)
+        if hb and lb: a.band+=hb-lb; a.band_n+=1
+        tm=_f(tm)
+        if tm is not None: a.tick_ms+=tm; a.tick_ms_n+=1
+    for s in sorted(aggs): yield aggs[s].row(cur,s)
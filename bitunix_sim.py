@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# In-process fake of the BitUnix futures endpoints BitunixClient uses.
+# FakeExchange is a drop-in transport: BitunixClient(k, s, transport=FakeExchange()).
+# It keeps orders, one long position and the account in memory, applies the buy price band (30014)
+# and margin checks (20003), fills resting orders when the mark moves through them, keeps filled and
+# cancelled orders for get_order_detail, and counts requests and bytes for benchmarks. Fills and cancels are also
+# pushed as private `order`/`position` events to `listeners`, which serve_ws relays over a local WebSocket.
+# Run this file to serve the same fake over HTTP (and, with --ws-port, WebSocket) on localhost.
+import json, time, threading, itertools, argparse
+
+class FakeExchange:
+    def __init__(self,symbol="BTCUSDT",mark=100000.0,band_pct=5.0,available=1000.0,leverage=3,base_precision=4,min_vol=0.0001,latency=0.0):
+        self.symbol=symbol; self.mark=float(mark); self.band_pct=float(band_pct)
+        self.available=float(available); self.frozen=0.0; self.leverage=int(leverage)
+        self.base_precision=base_precision; self.min_vol=min_vol; self.latency=float(latency)
+        self.orders={}; self.history={}; self.trades=[]; self.pos_qty=0.0; self.pos_entry=0.0; self.pos_margin=0.0; self.realized=0.0
+        self.ids=itertools.count(1); self.trade_ids=itertools.count(1); self.lock=threading.Lock()
+        self.listeners=[]   # callables fed each push as {"ch", "ts", "data"}
+        self.reset_counters()
+
+    def reset_counters(self):
+        self.requests=0; self.bytes_out=0; self.bytes_in=0; self.by_path={}
+
+    def stats(self): return {"requests":self.requests,"bytes_out":self.bytes_out,"bytes_in":self.bytes_in,"by_path":dict(self.by_path)}
+
+    def max_buy(self): return round(self.mark*(1+self.band_pct/100.0),2)
+
+    # transport interface
+    def request(self,method,url,headers=None,data=None):
+        if self.latency: time.sleep(self.latency)
+        path,_,qs=url.partition("?"); path="/api/"+path.split("/api/",1)[-1]
+        q=dict(kv.split("=",1) for kv in qs.split("&") if "=" in kv)
+        b=json.loads(data) if data else {}
+        with self.lock:
+            r=self._route(method,path,q,b)
+            self.requests+=1; self.by_path[path]=self.by_path.get(path,0)+1
+            self.bytes_out+=len(method)+len(url)+len(data or "")+sum(len(k)+len(str(v)) for k,v in (headers or {}).items())
+            self.bytes_in+=len(json.dumps(r,separators=(',',':')))
+        return r
+
+    def _route(self,method,path,q,b):
+        if path.endswith("/market/trading_pairs"): return ok([{"symbol":self.symbol,"basePrecision":self.base_precision,"minTradeVolume":str(self.min_vol)}])
+        if path.endswith("/market/tickers"): return ok([{"symbol":self.symbol,"markPrice":str(self.mark),"lastPrice":str(self.mark)}])
+        if path.endswith("/account/get_leverage_margin_mode"): return ok({"symbol":self.symbol,"marginCoin":"USDT","marginMode":"ISOLATION","leverage":self.leverage})
+        if path.endswith("/futures/account"): return ok({"marginCoin":"USDT","available":str(self.available),"frozen":str(self.frozen),"margin":str(self.pos_margin)})
+        if path.endswith("/account/change_leverage"): self.leverage=int(b["leverage"]); return ok({})
+        if path.startswith("/api/v1/futures/account/change_"): return ok({})
+        if path.endswith("/position/get_pending_positions"):
+            if self.pos_qty<=0: return ok([])
+            return ok([{"positionId":"pos-1","symbol":self.symbol,"side":"LONG","openQty":str(round(self.pos_qty,8)),"avgOpenPrice":str(self.pos_entry)}])
+        if path.endswith("/trade/place_order"):
+            r=self._place(b)
+            return ok({"orderId":r[0],"clientId":b.get("clientId")}) if r[1] is None else r[1]
+        if path.endswith("/trade/batch_order"):
+            good=[]; bad=[]
+            for o in b.get("orderList",[]):
+                oid,err=self._place({**o,"symbol":b.get("symbol")})
+                if err is None: good.append({"orderId":oid,"clientId":o.get("clientId")})
+                else: bad.append({"clientId":o.get("clientId"),"errorCode":str(err["code"]),"errorMsg":err["msg"]})
+            return ok({"successList":good,"failureList":bad})
+        if path.endswith("/trade/get_pending_orders"):
+            sym=b.get("symbol") or q.get("symbol")
+            return ok([{"orderId":oid,**o,"tradeQty":str(o["tradeQty"])} for oid,o in self.orders.items() if not sym or o["symbol"]==sym])
+        if path.endswith("/trade/get_history_orders"):
+            rows=[{"orderId":k,**o,"qty":str(o["qty"]),"tradeQty":str(o["tradeQty"]),"price":str(o["price"]),"avgPrice":str(o["avgPrice"])}
+                  for k,o in sorted(self.history.items(),key=lambda kv: kv[1]["ctime"]) if o["ctime"]>=int(q.get("startTime") or 0)]   # by create time, like the exchange
+            return page(rows,q,"orderList")
+        if path.endswith("/trade/get_history_trades"):
+            rows=[{**t,"qty":str(t["qty"]),"price":str(t["price"])} for t in self.trades if t["ctime"]>=int(q.get("startTime") or 0)]
+            return page(rows,q,"tradeList")
+        if path.endswith("/trade/get_order_detail"):
+            oid=q.get("orderId"); cid=q.get("clientId")
+            for k,o in list(self.orders.items())+list(self.history.items()):
+                if (oid and k==oid) or (cid and o.get("clientId")==cid):
+                    return ok({"orderId":k,**o,"status":o.get("status","NEW"),"qty":str(o["qty"]),"price":str(o["price"])})
+            return {"code":20007,"msg":"Order not found"}
+        if path.endswith("/trade/cancel_orders"):
+            good=[]; bad=[]
+            for o in b.get("orderIdList",[]):
+                if self._cancel(o.get("orderId")): good.append({"orderId":o.get("orderId")})
+                else: bad.append({"orderId":o.get("orderId"),"errorCode":"20007","errorMsg":"Order not found"})
+            return ok({"successList":good,"failureList":bad})
+        return {"code":10002,"msg":f"unknown endpoint {path}"}
+
+    def _place(self,b):
+        price=float(b["price"]); qty=float(b["qty"])
+        if qty<self.min_vol: return None,{"code":30001,"msg":"qty below minTradeVolume"}
+        if b["side"]=="BUY":
+            if price>self.max_buy(): return None,{"code":30014,"msg":f"Limit Order price exceeds the limit, Max Buy Order Price {self.max_buy()}"}
+            need=price*qty/self.leverage
+            if need>self.available+1e-9: return None,{"code":20003,"msg":"Insufficient balance"}
+            self.available-=need; self.frozen+=need
+        else:
+            resting=sum(o["qty"]-o["tradeQty"] for o in self.orders.values() if o["side"]=="SELL")
+            if b.get("reduceOnly") and resting+qty>self.pos_qty+1e-12: return None,{"code":30004,"msg":"Position not exist or reduce-only qty too large"}
+        oid=str(next(self.ids)); t=now_ms()
+        self.orders[oid]={"symbol":b.get("symbol",self.symbol),"side":b["side"],"price":price,"qty":qty,"clientId":b.get("clientId"),"reduceOnly":bool(b.get("reduceOnly")),
+                          "status":"NEW","tradeQty":0.0,"avgPrice":0.0,"ctime":t,"mtime":t}
+        return oid,None
+
+    def _cancel(self,oid):
+        o=self.orders.pop(oid,None)
+        if o is None: return False
+        self.history[oid]={**o,"status":"CANCELED","mtime":now_ms()}
+        if o["side"]=="BUY":
+            m=o["price"]*(o["qty"]-o["tradeQty"])/self.leverage; self.frozen-=m; self.available+=m
+        self._push_order(oid,self.history[oid],"CANCELED")
+        return True
+
+    def _fill(self,oid,qty):
+        # fill qty of a resting order at its limit price; the order moves to history once nothing is left
+        o=self.orders[oid]; qty=min(qty,o["qty"]-o["tradeQty"])
+        had=self.pos_qty
+        if o["side"]=="BUY":
+            m=o["price"]*qty/self.leverage; self.frozen-=m; self.pos_margin+=m
+            self.pos_entry=(self.pos_entry*self.pos_qty+o["price"]*qty)/(self.pos_qty+qty); self.pos_qty+=qty
+        else:
+            qty=min(qty,self.pos_qty)
+            if qty<=0: return
+            pnl=(o["price"]-self.pos_entry)*qty; m=self.pos_margin*qty/self.pos_qty
+            self.pos_qty-=qty; self.pos_margin-=m; self.available+=m+pnl; self.realized+=pnl
+        t=now_ms(); o["avgPrice"]=o["price"]; o["tradeQty"]+=qty; o["mtime"]=t
+        self.trades.append({"tradeId":str(next(self.trade_ids)),"orderId":oid,"symbol":o["symbol"],"side":o["side"],"price":o["price"],"qty":qty,"ctime":t})
+        if o["tradeQty"]>=o["qty"]-1e-12: self.history[oid]={**self.orders.pop(oid),"status":"FILLED"}
+        else: o["status"]="PART_FILLED"
+        self._push_order(oid,o,"FILLED" if oid in self.history else "PART_FILLED")
+        self._push("position",{"symbol":o["symbol"],"positionId":"pos-1","side":"LONG","qty":str(round(self.pos_qty,8)),"avgOpenPrice":str(self.pos_entry),
+                               "event":"OPEN" if had<=0 else "CLOSE" if self.pos_qty<=0 else "UPDATE"})
+
+    def _push(self,ch,data):
+        for f in list(self.listeners): f({"ch":ch,"ts":now_ms(),"data":data})
+
+    def _push_order(self,oid,o,status):
+        self._push("order",{"symbol":o["symbol"],"orderId":oid,"clientId":o.get("clientId"),"side":o["side"],"orderStatus":status,"price":str(o["price"]),
+                            "qty":str(o["qty"]),"tradeQty":str(o["tradeQty"]),"avgPrice":str(o["avgPrice"]),"ctime":o["ctime"],"mtime":o["mtime"]})
+
+    def partial_fill(self,oid,qty):
+        with self.lock: self._fill(oid,qty)
+
+    def set_mark(self,price):
+        # move the mark and fill every resting order it crosses; returns the filled order ids
+        with self.lock:
+            self.mark=float(price); done=[]
+            for oid,o in sorted(self.orders.items(),key=lambda kv: kv[1]["price"]):
+                if (o["side"]=="BUY" and self.mark<=o["price"]) or (o["side"]=="SELL" and self.mark>=o["price"] and self.pos_qty>0):
+                    self._fill(oid,o["qty"]); done.append(oid)
+            return done
+
+def ok(data): return {"code":0,"msg":"Success","data":data}
+
+def now_ms(): return int(time.time()*1000)
+
+def page(rows,q,key):
+    skip=int(q.get("skip") or 0); limit=int(q.get("limit") or 10)
+    return ok({key:rows[skip:skip+limit],"total":str(len(rows))})
+
+def serve(ex,host="127.0.0.1",port=8089):
+    # point bitunix_core.client.BASE at http://host:port to drive the real HTTP transport against ex;
+    # GET /sim/mark?price=P moves the mark (and fills what it crosses) from outside
+    from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+    class H(BaseHTTPRequestHandler):
+        def _go(self):
+            n=int(self.headers.get("Content-Length") or 0); d=self.rfile.read(n).decode() if n else None
+            if self.path.startswith("/sim/mark"): r=ok({"filled":ex.set_mark(float(self.path.partition("price=")[2]))})
+            else: r=ex.request(self.command,self.path,dict(self.headers),d)
+            body=json.dumps(r).encode()
+            self.send_response(200); self.send_header("Content-Type","application/json"); self.send_header("Content-Length",str(len(body))); self.end_headers(); self.wfile.write(body)
+        do_GET=_go; do_POST=_go
+        def log_message(self,*a): pass
+    srv=ThreadingHTTPServer((host,port),H)
+    return srv
+
+async def serve_ws(ex,host="127.0.0.1",port=8090):
+    # Stand-in for the private WebSocket: answers login/subscribe/ping and relays ex's order and position pushes to
+    # every connection. The pushes come from whichever thread moved the mark, so they hop onto the loop first.
+    import asyncio, websockets
+    loop=asyncio.get_running_loop()
+    async def conn(ws):
+        q=asyncio.Queue(); push=lambda m: loop.call_soon_threadsafe(q.put_nowait,m)
+        async def relay():
+            while True: await ws.send(json.dumps(await q.get()))
+        ex.listeners.append(push); task=asyncio.create_task(relay())
+        try:
+            async for raw in ws:
+                m=json.loads(raw); op=m.get("op")
+                if op=="ping": await ws.send(json.dumps({"op":"pong","pong":m.get("ping")}))
+                elif op in ("login","subscribe"): await ws.send(json.dumps({"op":op,"data":{"result":True}}))
+        except websockets.ConnectionClosed: pass
+        finally: ex.listeners.remove(push); task.cancel()
+    return await websockets.serve(conn,host,port)
+
+if __name__=="__main__":
+    ap=argparse.ArgumentParser()
+    ap.add_argument("--host",default="127.0.0.1"); ap.add_argument("--port",type=int,default=8089)
+    ap.add_argument("--mark",type=float,default=100000.0); ap.add_argument("--band-pct",type=float,default=5.0)
+    ap.add_argument("--available",type=float,default=1000.0); ap.add_argument("--latency",type=float,default=0.0)
+    ap.add_argument("--ws-port",type=int,default=None,help="also serve the private order/position pushes here")
+    a=ap.parse_args()
+    ex=FakeExchange(mark=a.mark,band_pct=a.band_pct,available=a.available,latency=a.latency); srv=serve(ex,a.host,a.port)
+    print(f"fake BitUnix on http://{a.host}:{a.port}")
+    if a.ws_port is None: srv.serve_forever()
+    else:
+        import asyncio
+        threading.Thread(target=srv.serve_forever,daemon=True).start()
+        async def main():
+            await serve_ws(ex,a.host,a.ws_port); print(f"private pushes on ws://{a.host}:{a.ws_port}")
+            await asyncio.Future()
+        asyncio.run(main())